@@ -0,0 +1,47 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+
+CATEGORIES = ['服装', '数码', '家电', '美妆', '食品', '母婴', '图书', '运动']
+AREAS = ['华东-上海', '华东-杭州', '华南-广州', '华南-深圳', '华北-北京', '西南-成都', '华中-武汉', '东北-哈尔滨']
+
+def make_orders(n_rows, seed=42, n_days=30):
+    rng = np.random.default_rng(seed)
+    purchase = rng.uniform(10, 2000, n_rows).round(2)
+    price = (purchase * rng.uniform(1.05, 1.6, n_rows)).round(2)
+    quantity = rng.integers(1, 20, n_rows)
+    revenue = (price * quantity).round(2)
+    profit = ((price - purchase) * quantity).round(2)
+
+    purchase_text = np.char.add('¥', np.char.mod('%.2f', purchase)).astype(object)
+    purchase_text[rng.random(n_rows) < 0.02] = np.nan
+
+    return pd.DataFrame({
+        '订单号': np.arange(n_rows),
+        '日期': rng.integers(1, n_days + 1, n_rows),
+        '商品品类': rng.choice(CATEGORIES, n_rows),
+        '区域': rng.choice(AREAS, n_rows),
+        '进货价格': purchase_text,
+        '实际售价': price,
+        '销售数': quantity,
+        '销售额': revenue,
+        '利润': profit,
+        '毛利率': np.char.add(np.char.mod('%.1f', rng.uniform(5, 40, n_rows)), '%'),
+        '客户年龄': rng.integers(18, 65, n_rows)
+    })
+
+def write_orders_csv(path, n_rows, seed=42, block_rows=200000):
+    written = 0
+    while written < n_rows:
+        rows = min(block_rows, n_rows - written)
+        block = make_orders(rows, seed=seed + written)
+        block['订单号'] += written
+        block.to_csv(path, mode='w' if written == 0 else 'a', header=written == 0, index=False)
+        written += rows
+    return path
@@ -0,0 +1,71 @@
+"""Row-wise regex apply vs. the shared vectorized numeric-string parser.
+
+Prices are drawn from a catalog of ``--distinct`` values, as in a real order
+export; ``--distinct 0`` makes nearly every row unique (worst case).
+
+    python benchmarks/bench_numeric_parsing.py --rows 10000000
+    python benchmarks/bench_numeric_parsing.py --rows 10000000 --distinct 0
+"""
+import argparse
+import re
+import time
+
+import numpy as np
+import pandas as pd
+
+from _data import ROOT_DIR  # noqa: F401
+from src.core.data_processor import parse_numeric_columns
+
+def make_price_strings(n_rows, distinct=50000, seed=42):
+    rng = np.random.default_rng(seed)
+    if distinct:
+        amounts = rng.uniform(1, 5000, distinct).round(2)[rng.integers(0, distinct, n_rows)]
+    else:
+        amounts = rng.uniform(1, 5000, n_rows).round(2)
+    formats = rng.integers(0, 4, n_rows)
+    text = np.char.mod('%.2f', amounts).astype(object)
+    text[formats == 0] = np.char.add('¥', text[formats == 0].astype(str))
+    text[formats == 1] = np.char.add(np.char.add('约', text[formats == 1].astype(str)), '元')
+    text[formats == 2] = [f"¥{value:,.2f}" for value in amounts[formats == 2]]
+    text[rng.random(n_rows) < 0.01] = np.nan
+    return pd.Series(text, name='进货价格')
+
+def make_percent_strings(n_rows, seed=43):
+    rng = np.random.default_rng(seed)
+    return pd.Series(np.char.add(np.char.mod('%.1f', rng.uniform(0, 60, n_rows)), '%').astype(object), name='毛利率')
+
+def rowwise(series, percent=False):
+    values = series.apply(
+        lambda x: float(re.sub(r'[^\d\.]', '', str(x))) if re.search(r'\d', str(x)) else None
+    ).astype(float)
+    return values / 100 if percent else values
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, default=10000000)
+    parser.add_argument('--distinct', type=int, default=50000)
+    args = parser.parse_args()
+
+    df = pd.DataFrame({
+        '进货价格': make_price_strings(args.rows, distinct=args.distinct),
+        '毛利率': make_percent_strings(args.rows)
+    })
+
+    start = time.perf_counter()
+    expected = {'进货价格': rowwise(df['进货价格']), '毛利率': rowwise(df['毛利率'], percent=True)}
+    rowwise_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    parsed = parse_numeric_columns(df, ['进货价格', '毛利率'], percent_columns=['毛利率'])
+    vectorized_seconds = time.perf_counter() - start
+
+    for col in expected:
+        np.testing.assert_allclose(parsed[col].to_numpy(), expected[col].to_numpy(), equal_nan=True)
+
+    print(f"rows:        {args.rows:,} x 2 columns, distinct prices: {args.distinct or 'all'}")
+    print(f"row-wise:    {rowwise_seconds:.2f}s")
+    print(f"vectorized:  {vectorized_seconds:.2f}s")
+    print(f"speedup:     {rowwise_seconds / vectorized_seconds:.1f}x")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,75 @@
+"""Peak RSS of full vs. chunked CSV ingestion as the input grows.
+
+``full`` and ``keep`` are the two upload paths of the app (whole-file read
+vs. chunked cleaning that keeps the compacted chunks); both end with the
+whole compacted dataset in memory. ``stream`` keeps only the aggregates.
+
+    python benchmarks/bench_streaming_ingest.py --sizes 500000 1000000 2000000 4000000
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+from _data import ROOT_DIR, write_orders_csv
+
+def run_worker(path, mode, chunksize):
+    from src.core.data_processor import DataProcessor
+    from src.core.streaming import ChunkAggregator, stream_csv
+    import pandas as pd
+
+    start = time.perf_counter()
+    if mode == 'stream':
+        aggregator = stream_csv(path, chunksize=chunksize, group_keys=['商品品类', '日期'])
+    elif mode == 'keep':
+        aggregator, df = stream_csv(path, chunksize=chunksize, group_keys=['商品品类', '日期'],
+                                    keep_chunks=True, compact=True)
+    else:
+        processor = DataProcessor()
+        df = processor.clean_numeric_columns(pd.read_csv(path))
+        aggregator = ChunkAggregator(group_keys=['商品品类', '日期']).update(df)
+        df, _ = processor.compact_dtypes(df)
+    elapsed = time.perf_counter() - start
+
+    peak_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(json.dumps({'rows': aggregator.row_count, 'seconds': elapsed, 'peak_mb': peak_kb / 1024}))
+
+def measure(path, mode, chunksize):
+    output = subprocess.run(
+        [sys.executable, __file__, '--worker', path, '--mode', mode, '--chunksize', str(chunksize)],
+        check=True, capture_output=True, text=True, cwd=ROOT_DIR
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--sizes', type=int, nargs='+', default=[500000, 1000000, 2000000, 4000000])
+    parser.add_argument('--chunksize', type=int, default=100000)
+    parser.add_argument('--worker')
+    parser.add_argument('--mode', default='stream')
+    args = parser.parse_args()
+
+    if args.worker:
+        run_worker(args.worker, args.mode, args.chunksize)
+        return
+
+    print(f"{'rows':>10} {'file MB':>8} {'full MB':>9} {'keep MB':>9} {'stream MB':>10} "
+          f"{'full s':>8} {'keep s':>8} {'stream s':>9}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for n_rows in args.sizes:
+            path = os.path.join(tmp, f'orders_{n_rows}.csv')
+            write_orders_csv(path, n_rows)
+            file_mb = os.path.getsize(path) / 1024 ** 2
+            full = measure(path, 'full', args.chunksize)
+            keep = measure(path, 'keep', args.chunksize)
+            stream = measure(path, 'stream', args.chunksize)
+            print(f"{n_rows:>10} {file_mb:>8.1f} {full['peak_mb']:>9.1f} {keep['peak_mb']:>9.1f} {stream['peak_mb']:>10.1f} "
+                  f"{full['seconds']:>8.2f} {keep['seconds']:>8.2f} {stream['seconds']:>9.2f}")
+            os.remove(path)
+
+if __name__ == '__main__':
+    main()
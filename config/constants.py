@@ -3,6 +3,8 @@ CONSTANTS = {
     'PERCENT_KEYWORDS': ['率', '百分比', '占比'],
     'ID_KEYWORDS': ['id', '订单号', '日期', '编号', '序号'],
     'ORDINAL_KEYWORDS': ['等级', '年龄', '评分', '段位', '层次'],
+    'SKU_COLUMNS': ['SKU', 'sku', '商品编号', '商品ID', '商品名称'],
+    'STANDARDIZE_COLUMNS': ['进货价格', '实际售价', '销售数', '利润', '销售额'],
     'CITY_TIERS': {
         '一线城市': ['北京', '上海', '广州', '深圳'],
         '二线城市': ['昆明', '福州', '厦门', '无锡', '哈尔滨', '长春', '宁波', '济南', '大连', '郑州'],
@@ -2,11 +2,28 @@ SETTINGS = {
     'data_processing': {
         'missing_threshold': 0.5,
         'outlier_threshold': 3.0,
-        'standardization_method': 'zscore'
+        'standardization_method': 'zscore',
+        'chunk_size': 100000,
+        'compact_dtypes': True,
+        'category_max_ratio': 0.5,
+        'float32_atol': 1e-3,
+        'approx_distinct_rows': 1000000,
+        'distinct_sketch_size': 4096,
+        'partition_workers': None,
+        'excel_all_sheets': False,
+        'excel_workers': None
     },
     'analysis': {
         'clustering_n_clusters': 3,
+        'clustering_large_rows': 200000,
+        'clustering_k_min': 2,
+        'clustering_k_max': 8,
+        'clustering_batch_size': 4096,
+        'clustering_fit_rows': 100000,
+        'silhouette_sample_size': 5000,
+        'clustering_workers': None,
         'correlation_threshold': 0.7,
+        'correlation_block_size': 512,
         'confidence_level': 0.95
     },
     'visualization': {
@@ -17,6 +34,42 @@ SETTINGS = {
     'forecasting': {
         'test_size': 0.2,
         'arima_order': (2, 1, 2),
-        'forecast_horizon': 14
+        'forecast_horizon': 14,
+        'hierarchy_levels': ['商品品类', '省份'],
+        'batch_workers': None,
+        'batch_size': 50,
+        'auto_order': False,
+        'order_search_max_p': 3,
+        'order_search_max_d': 2,
+        'order_search_max_q': 3,
+        'order_search_max_fits': 16,
+        'order_search_workers': None,
+        'order_search_tol': 0.5,
+        'feature_lags': [1, 2, 3, 7],
+        'rolling_windows': [3, 7],
+        'backtest_folds': 5,
+        'backtest_horizon': 3,
+        'backtest_window': 'expanding',
+        'backtest_min_train': 14,
+        'backtest_workers': None
+    },
+    'cache': {
+        'dataset_dir': '.cache/datasets',
+        'dataset_max_mb': 2048,
+        'result_max_mb': 512,
+        'model_dir': '.cache/models',
+        'model_max_mb': 1024,
+        'model_max_age_days': 30,
+        'model_memory_entries': 32
+    },
+    'jobs': {
+        'max_workers': 2,
+        'max_finished': 20,
+        'process_start_method': 'spawn'
+    },
+    'cli': {
+        'output_dir': 'outputs',
+        'workers': None,
+        'tasks': ['task1', 'task2', 'task3', 'task4']
     }
 }
@@ -0,0 +1,265 @@
+import argparse
+import glob
+import json
+import os
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from config.settings import SETTINGS
+
+# 命令行批处理入口：python -m src.cli 数据.csv [更多文件或目录] -o 输出目录
+# 只在工作进程中按需导入 pandas/sklearn 等依赖，不加载 streamlit 与 plotly
+
+TASKS = ['task1', 'task2', 'task3', 'task4']
+TASK_CLASSES = {
+    'task1': ('src.tasks.task1_preprocessing', 'Task1Preprocessor'),
+    'task2': ('src.tasks.task2_multidimensional', 'Task2Analyzer'),
+    'task3': ('src.tasks.task3_forecasting', 'Task3Forecaster'),
+    'task4': ('src.tasks.task4_optimization', 'Task4Optimizer')
+}
+FILTER_PATTERN = re.compile(r'^\s*(.+?)\s*(==|!=|<=|>=|<|>|=)\s*(.+?)\s*$')
+INPUT_EXTENSIONS = ('.csv', '.xlsx', '.parquet')
+# 并行处理多个文件时，各任务内部的进程池退化为串行，避免进程数成倍增长
+INNER_WORKER_SETTINGS = [
+    ('data_processing', 'partition_workers'),
+    ('data_processing', 'excel_workers'),
+    ('analysis', 'clustering_workers'),
+    ('forecasting', 'batch_workers'),
+    ('forecasting', 'order_search_workers'),
+    ('forecasting', 'backtest_workers')
+]
+
+def expand_inputs(paths, partitioned=False):
+    files = []
+    for path in paths:
+        if partitioned and os.path.isdir(path):
+            # 分区目录整体作为一个数据集处理
+            files.append(os.path.normpath(path))
+            continue
+        if os.path.isdir(path):
+            matches = [os.path.join(path, name) for name in sorted(os.listdir(path))]
+        else:
+            matches = sorted(glob.glob(path)) or [path]
+        files.extend(match for match in matches if not os.path.isdir(match) and match.endswith(INPUT_EXTENSIONS))
+    return list(dict.fromkeys(files))
+
+def output_names(files):
+    # 不同目录下的同名文件加上所在目录名区分，输出不互相覆盖
+    stems = [os.path.splitext(os.path.basename(os.path.normpath(path)))[0] for path in files]
+    names = {}
+    for path, stem in zip(files, stems):
+        parent = os.path.basename(os.path.dirname(os.path.abspath(path)))
+        names[path] = f"{parent}_{stem}" if stems.count(stem) > 1 else stem
+    return names
+
+def parse_filter(text):
+    # "月份>=2024-02"、"日期<=24"、"商品品类=服装,数码"
+    match = FILTER_PATTERN.match(text)
+    if match is None:
+        raise argparse.ArgumentTypeError(f"无法解析过滤条件: {text}")
+    column, op, raw = match.groups()
+    values = []
+    for item in raw.split(','):
+        try:
+            values.append(int(item))
+        except ValueError:
+            try:
+                values.append(float(item))
+            except ValueError:
+                values.append(item)
+    op = '==' if op == '=' else op
+    if len(values) > 1:
+        if op not in ('==', '!='):
+            raise argparse.ArgumentTypeError(f"多个取值只能与 = 或 != 搭配: {text}")
+        return (column, 'in' if op == '==' else 'not in', values)
+    return (column, op, values[0])
+
+def required_columns(tasks):
+    import importlib
+    from src.core.partitions import union_columns
+
+    # 只读入所选任务声明需要的列，任一任务需要全部列时不做投影
+    column_lists = []
+    for name in tasks:
+        module, cls = TASK_CLASSES[name]
+        column_lists.append(getattr(importlib.import_module(module), cls).REQUIRED_COLUMNS)
+    return union_columns(*column_lists)
+
+def _single_worker_settings():
+    for section, key in INNER_WORKER_SETTINGS:
+        SETTINGS[section][key] = 1
+
+def _export(name, value, directory, summary):
+    import numpy as np
+    import pandas as pd
+
+    if value is None:
+        return
+    if isinstance(value, pd.DataFrame):
+        keep_index = not isinstance(value.index, pd.RangeIndex)
+        value.to_csv(os.path.join(directory, f"{name}.csv"), index=keep_index, encoding='utf-8-sig')
+    elif isinstance(value, pd.Series):
+        value.to_frame().to_csv(os.path.join(directory, f"{name}.csv"), encoding='utf-8-sig')
+    elif isinstance(value, np.ndarray):
+        pd.DataFrame(value.reshape(len(value), -1)).to_csv(os.path.join(directory, f"{name}.csv"), index=False)
+    elif hasattr(value, 'savefig'):
+        value.savefig(os.path.join(directory, f"{name}.png"), dpi=SETTINGS['visualization']['dpi'], bbox_inches='tight')
+    elif isinstance(value, dict):
+        for key, item in value.items():
+            _export(f"{name}_{key}", item, directory, summary)
+    elif isinstance(value, (list, tuple)) and value and all(isinstance(item, str) for item in value):
+        with open(os.path.join(directory, f"{name}.txt"), 'w', encoding='utf-8') as file:
+            file.write('\n'.join(value) + '\n')
+    elif isinstance(value, (bool, int, float, str, tuple, np.generic)):
+        summary[name] = value.item() if isinstance(value, np.generic) else value
+
+def load_and_clean(path, columns=None, filters=None, pattern=None, cache_dir=None):
+    from src.core.data_processor import DataProcessor
+    from src.core.partitions import PartitionedDataset
+
+    # 单个文件视为只有一个分区的数据集；分区目录按文件并行解析，数值解析在各分区进程中完成
+    dataset = PartitionedDataset(path, pattern=pattern, cache_dir=cache_dir)
+    df = dataset.read(columns=columns, filters=filters)
+    # 与界面上传流程一致：区域补充、类型压缩
+    processor = DataProcessor()
+    df = processor.enrich_regions(df)
+    if SETTINGS['data_processing']['compact_dtypes']:
+        df, _ = processor.compact_dtypes(df)
+    return df, dataset.last_read
+
+def run_file(path, output_root, tasks=None, model_dir=None, filters=None, pattern=None, name=None, cache_dir=None):
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    from src.core.cube import AggregateCube
+    from src.tasks.task1_preprocessing import Task1Preprocessor
+    from src.tasks.task2_multidimensional import Task2Analyzer
+    from src.tasks.task3_forecasting import Task3Forecaster
+    from src.tasks.task4_optimization import Task4Optimizer
+    from src.utils.cache_utils import ModelStore
+
+    tasks = tasks or TASKS
+    directory = os.path.join(output_root, name or output_names([path])[path])
+    os.makedirs(directory, exist_ok=True)
+    report = {
+        'file': path, 'output_dir': directory, 'status': 'ok', 'rows': None, 'partitions': None,
+        'seconds': {}, 'errors': {}, 'summary': {}
+    }
+    start = time.perf_counter()
+
+    def run(name, step):
+        step_start = time.perf_counter()
+        try:
+            step()
+        except Exception as e:
+            report['errors'][name] = f"{type(e).__name__}: {e}"
+        report['seconds'][name] = round(time.perf_counter() - step_start, 3)
+
+    model_store = ModelStore(cache_dir=model_dir) if model_dir else None
+    state = {}
+
+    def load():
+        state['df'], report['partitions'] = load_and_clean(path, required_columns(tasks), filters, pattern, cache_dir)
+        state['cube'] = AggregateCube.build(state['df'])
+        report['rows'] = len(state['df'])
+
+    def task1():
+        result_files, progress_log = Task1Preprocessor(state['df'], model_store=model_store).generate_all_results()
+        if result_files is None:
+            raise RuntimeError('; '.join(progress_log))
+        for filename, data in result_files.items():
+            data.to_csv(os.path.join(directory, filename), index=False, encoding='utf-8-sig')
+
+    def task2():
+        analyzer = Task2Analyzer(state['df'], cube=state['cube'])
+        _export('task2', analyzer.perform_analysis(), directory, report['summary'])
+        _export('task2', analyzer.results.get('heatmaps'), directory, report['summary'])
+        plt.close('all')
+
+    def task3():
+        results = Task3Forecaster(state['df'], cube=state['cube'], model_store=model_store).perform_forecasting()
+        if 'error' in results:
+            raise RuntimeError(results['error'])
+        _export('task3', results, directory, report['summary'])
+
+    def task4():
+        _export('task4', Task4Optimizer(state['df'], cube=state['cube']).perform_optimization(), directory, report['summary'])
+
+    run('load', load)
+    if 'load' not in report['errors']:
+        steps = {'task1': task1, 'task2': task2, 'task3': task3, 'task4': task4}
+        for name in tasks:
+            run(name, steps[name])
+
+    if report['errors']:
+        report['status'] = 'failed'
+    report['seconds']['total'] = round(time.perf_counter() - start, 3)
+    with open(os.path.join(directory, 'summary.json'), 'w', encoding='utf-8') as file:
+        json.dump(report, file, ensure_ascii=False, indent=2, default=str)
+    return report
+
+def run_files(files, output_root, tasks=None, workers=None, model_dir=None, log=None, filters=None, pattern=None,
+              cache_dir=None):
+    log = log or (lambda message: None)
+    names = output_names(files)
+    workers = max(1, min(workers or SETTINGS['cli']['workers'] or os.cpu_count() or 1, len(files)))
+    reports = []
+
+    def finished(report):
+        reports.append(report)
+        errors = '; '.join(f"{name}: {error}" for name, error in report['errors'].items())
+        log(f"[{len(reports)}/{len(files)}] {report['status']} {report['file']} ({report['seconds']['total']:.1f} 秒){' ' + errors if errors else ''}")
+
+    if workers == 1:
+        for path in files:
+            finished(run_file(path, output_root, tasks, model_dir, filters, pattern, names[path], cache_dir))
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_single_worker_settings) as executor:
+            futures = {
+                executor.submit(run_file, path, output_root, tasks, model_dir, filters, pattern, names[path], cache_dir): path
+                for path in files
+            }
+            for future in as_completed(futures):
+                try:
+                    finished(future.result())
+                except Exception as e:
+                    # 工作进程异常退出（如内存不足）时该文件记为失败，其余文件继续
+                    path = futures[future]
+                    finished({'file': path, 'status': 'failed', 'seconds': {'total': 0.0}, 'errors': {'worker': f"{type(e).__name__}: {e}"}})
+    return reports
+
+def build_parser():
+    settings = SETTINGS['cli']
+    parser = argparse.ArgumentParser(prog='python -m src.cli', description='电商销售分析命令行批处理：对一个或多个数据文件运行任务1~4并输出结果文件')
+    parser.add_argument('inputs', nargs='+', help='CSV/Excel/Parquet 文件、目录或通配符')
+    parser.add_argument('-p', '--partitioned', action='store_true', help='每个输入目录作为一个分区数据集（如按月拆分的文件）整体分析')
+    parser.add_argument('--pattern', default=None, help=r'从文件路径解析分区键的正则，如 "(?P<月份>\d{4}-\d{2})"；也识别 月份=2024-01 形式的路径段')
+    parser.add_argument('-f', '--filter', dest='filters', action='append', type=parse_filter, default=[],
+                        help='过滤条件，可重复，如 "月份>=2024-02"；作用于分区键时整文件跳过，否则逐行过滤')
+    parser.add_argument('-o', '--output-dir', default=settings['output_dir'], help='输出根目录，每个输入文件一个子目录')
+    parser.add_argument('-t', '--tasks', nargs='+', choices=TASKS, default=settings['tasks'], help='要运行的任务')
+    parser.add_argument('-j', '--workers', type=int, default=None, help='并行处理的文件数，默认为 CPU 核数')
+    parser.add_argument('--model-dir', default=None, help='模型缓存目录，重复运行相同数据时复用已拟合的模型')
+    parser.add_argument('--cache-dir', default=None, help='数据缓存目录，CSV/Excel 解析清洗后以 Parquet 缓存，同一文件不再重复解析')
+    parser.add_argument('-q', '--quiet', action='store_true', help='只输出汇总')
+    return parser
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    files = expand_inputs(args.inputs, args.partitioned)
+    if not files:
+        print("未找到 CSV/Excel/Parquet 输入文件", file=sys.stderr)
+        return 2
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    log = (lambda message: None) if args.quiet else (lambda message: print(message, file=sys.stderr, flush=True))
+    start = time.perf_counter()
+    reports = run_files(files, args.output_dir, args.tasks, args.workers, args.model_dir, log, args.filters, args.pattern,
+                        args.cache_dir)
+    failed = [report for report in reports if report['status'] != 'ok']
+    print(f"完成 {len(reports) - len(failed)}/{len(reports)} 个文件，耗时 {time.perf_counter() - start:.1f} 秒，结果位于 {args.output_dir}")
+    return 1 if failed else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,5 +1,15 @@
 from .data_processor import DataProcessor
 from .analyzer import Analyzer
 from .visualizer import Visualizer
+from .streaming import ChunkAggregator, CorrelationAccumulator, accumulate_correlations, stream_csv
+from .profiler import DataProfile, profile_dataframe
+from .regions import enrich_regions, parse_region_values
+from .cube import AggregateCube
+from .elasticity import grouped_price_sensitivity
+from .classification import abc_xyz_classification
+from .order_search import search_arima_order
+from .rollups import TrendRollups
+from .incremental import IncrementalDataset
+from .partitions import PartitionedDataset
 
-__all__ = ['DataProcessor', 'Analyzer', 'Visualizer']
+__all__ = ['DataProcessor', 'Analyzer', 'Visualizer', 'ChunkAggregator', 'CorrelationAccumulator', 'accumulate_correlations', 'stream_csv', 'DataProfile', 'profile_dataframe', 'enrich_regions', 'parse_region_values', 'AggregateCube', 'grouped_price_sensitivity', 'abc_xyz_classification', 'search_arima_order', 'TrendRollups', 'IncrementalDataset', 'PartitionedDataset']
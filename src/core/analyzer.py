@@ -1,20 +1,80 @@
 import pandas as pd
 import numpy as np
-from sklearn.cluster import KMeans
+import os
+import scipy.sparse as sp
+from sklearn.cluster import KMeans, MiniBatchKMeans
 from sklearn.metrics import silhouette_score
+from sklearn.preprocessing import StandardScaler
+from config.settings import SETTINGS
+from src.core.rollups import TrendRollups
+from src.utils.job_scheduler import process_pool
+
+def _split_sparse_columns(df, columns):
+    sparse_cols = [col for col in columns if isinstance(df[col].dtype, pd.SparseDtype)]
+    dense_cols = [col for col in columns if col not in sparse_cols]
+    return dense_cols, sparse_cols
+
+def _sparse_numeric_matrix(df, dense_cols, sparse_cols, fill_values):
+    # 稠密数值列与独热稀疏列拼成一个 CSR 矩阵，全程不展开为稠密矩阵
+    blocks = []
+    if dense_cols:
+        blocks.append(sp.csr_matrix(df[dense_cols].fillna(fill_values).to_numpy(dtype=np.float64)))
+    if sparse_cols:
+        blocks.append(df[sparse_cols].sparse.to_coo().tocsr())
+    return sp.hstack(blocks, format='csr')
+
+def sparse_correlation(matrix):
+    n_rows = matrix.shape[0]
+    mean = np.asarray(matrix.mean(axis=0)).ravel()
+    gram = (matrix.T @ matrix).toarray()
+    cov = (gram - n_rows * np.outer(mean, mean)) / (n_rows - 1)
+    std = np.sqrt(np.clip(np.diag(cov), 0, None))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        corr = cov / np.outer(std, std)
+    corr[:, std == 0] = np.nan
+    corr[std == 0, :] = np.nan
+    np.fill_diagonal(corr, np.where(std == 0, np.nan, 1.0))
+    return np.clip(corr, -1, 1)
+
+def _fit_minibatch_kmeans(fit_features, sample_features, n_clusters, batch_size, random_state=42):
+    # 在子进程中拟合，只传入有界样本、传回模型与评分，单个 k 的代价与总行数无关
+    model = MiniBatchKMeans(n_clusters=n_clusters, batch_size=batch_size, n_init=3, random_state=random_state)
+    model.fit(fit_features)
+    sample_labels = model.predict(sample_features)
+    if len(np.unique(sample_labels)) > 1:
+        score = silhouette_score(sample_features, sample_labels)
+    else:
+        score = np.nan
+    return n_clusters, score, model
 
 class Analyzer:
-    def __init__(self, df):
-        self.df = df.copy()
+    def __init__(self, df, copy=True, cube=None, rollups=None):
+        self.df = df.copy() if copy else df
+        self.cube = cube
+        self.rollups = rollups
         self.results = {}
     
-    def perform_clustering(self, n_clusters=3):
+    def perform_clustering(self, n_clusters=None, large_data=None):
+        settings = SETTINGS['analysis']
+        if large_data is None:
+            large_data = len(self.df) >= settings['clustering_large_rows']
+        if large_data:
+            k_values = [n_clusters] if n_clusters is not None else None
+            result = self.perform_scalable_clustering(k_values=k_values)
+            return None if result is None else result['labels']
+        if n_clusters is None:
+            n_clusters = settings['clustering_n_clusters']
+
         numeric_cols = self.df.select_dtypes(include=[np.number]).columns.tolist()
         
         if len(numeric_cols) < 2:
             return None
             
-        df_numeric = self.df[numeric_cols].fillna(0)
+        dense_cols, sparse_cols = _split_sparse_columns(self.df, numeric_cols)
+        if sparse_cols:
+            df_numeric = _sparse_numeric_matrix(self.df, dense_cols, sparse_cols, 0)
+        else:
+            df_numeric = self.df[numeric_cols].fillna(0)
         
         kmeans = KMeans(n_clusters=n_clusters, random_state=42, n_init='auto')
         cluster_labels = kmeans.fit_predict(df_numeric)
@@ -28,26 +88,199 @@ class Analyzer:
         
         return cluster_labels
     
-    def calculate_correlations(self):
+    def perform_scalable_clustering(self, k_values=None, batch_size=None, sample_size=None, max_workers=None):
+        settings = SETTINGS['analysis']
+        k_values = list(k_values or range(settings['clustering_k_min'], settings['clustering_k_max'] + 1))
+        batch_size = batch_size or settings['clustering_batch_size']
+        sample_size = sample_size or settings['silhouette_sample_size']
+        fit_rows = settings['clustering_fit_rows']
+        max_workers = max_workers or settings['clustering_workers'] or os.cpu_count() or 1
+
+        numeric_cols = [col for col in self.df.select_dtypes(include=[np.number]).columns if col != 'cluster']
+        if len(numeric_cols) < 2:
+            return None
+
+        # 标准化后再聚类，避免销售额等大量纲字段主导距离
+        dense_cols, sparse_cols = _split_sparse_columns(self.df, numeric_cols)
+        if sparse_cols:
+            features = _sparse_numeric_matrix(self.df, dense_cols, sparse_cols, self.df[dense_cols].mean())
+            scaler = StandardScaler(with_mean=False)
+            feature_names = dense_cols + sparse_cols
+        else:
+            features = self.df[numeric_cols].fillna(self.df[numeric_cols].mean()).to_numpy(dtype=np.float64)
+            scaler = StandardScaler()
+            feature_names = numeric_cols
+        features = scaler.fit_transform(features).astype(np.float32)
+
+        n_rows = features.shape[0]
+        k_values = [k for k in k_values if 1 < k < n_rows]
+        if not k_values:
+            return None
+        # 每个 k 只在有界样本上拟合，全量数据仅做一次线性的标签分配
+        rng = np.random.default_rng(42)
+        fit_index = np.sort(rng.choice(n_rows, size=min(fit_rows, n_rows), replace=False))
+        sample_index = np.sort(rng.choice(n_rows, size=min(sample_size, n_rows), replace=False))
+        fit_features = features[fit_index]
+        sample_features = features[sample_index]
+
+        if max_workers == 1 or len(k_values) == 1:
+            fits = [_fit_minibatch_kmeans(fit_features, sample_features, k, batch_size) for k in k_values]
+        else:
+            with process_pool(min(max_workers, len(k_values))) as executor:
+                fits = list(executor.map(
+                    _fit_minibatch_kmeans,
+                    [fit_features] * len(k_values),
+                    [sample_features] * len(k_values),
+                    k_values,
+                    [batch_size] * len(k_values)
+                ))
+
+        scores = {k: score for k, score, _ in fits}
+        models = {k: model for k, _, model in fits}
+        valid_scores = {k: score for k, score in scores.items() if not np.isnan(score)}
+        best_k = max(valid_scores, key=valid_scores.get) if valid_scores else k_values[0]
+        best_model = models[best_k]
+
+        cluster_labels = best_model.predict(features)
+        centers = best_model.cluster_centers_.astype(np.float64)
+        centers = pd.DataFrame(scaler.inverse_transform(centers), columns=feature_names)
+
+        self.df['cluster'] = cluster_labels
+        self.results['clustering'] = {
+            'labels': cluster_labels,
+            'best_k': best_k,
+            'scores': scores,
+            'inertia': {k: model.inertia_ for k, model in models.items()},
+            'centers': centers
+        }
+        return self.results['clustering']
+    
+    def calculate_correlations(self, accumulator=None):
+        if accumulator is not None:
+            # 使用分块累计的协矩状态，无需全表在内存中
+            correlation_matrix = accumulator.correlation()
+            self.results['correlations'] = correlation_matrix
+            return correlation_matrix
+
         numeric_cols = self.df.select_dtypes(include=[np.number]).columns.tolist()
         
         if len(numeric_cols) < 2:
             return None
             
-        correlation_matrix = self.df[numeric_cols].corr()
+        dense_cols, sparse_cols = _split_sparse_columns(self.df, numeric_cols)
+        # 稀疏路径无法做成对剔除缺失值，存在缺失值时走 .corr()，保证两条路径结果一致
+        if sparse_cols and not self.df[numeric_cols].isna().any().any():
+            matrix = _sparse_numeric_matrix(self.df, dense_cols, sparse_cols, 0)
+            correlation_matrix = pd.DataFrame(
+                sparse_correlation(matrix),
+                index=dense_cols + sparse_cols,
+                columns=dense_cols + sparse_cols
+            ).loc[numeric_cols, numeric_cols]
+        else:
+            correlation_matrix = self.df[numeric_cols].corr()
         self.results['correlations'] = correlation_matrix
         
         return correlation_matrix
     
-    def analyze_sales_trends(self, date_column=None):
-        if date_column and date_column in self.df.columns:
-            self.df[date_column] = pd.to_datetime(self.df[date_column])
-            daily_sales = self.df.groupby(self.df[date_column].dt.date).agg({
-                '销售额': 'sum',
-                '利润': 'sum',
-                '销售数': 'sum'
-            }).reset_index()
-            
-            self.results['sales_trends'] = daily_sales
-            return daily_sales
-        return None
+    def _standardized_columns(self, columns):
+        dense_cols, sparse_cols = _split_sparse_columns(self.df, columns)
+        blocks, means, stds = [], [], []
+        if dense_cols:
+            # 稠密列先中心化、标准化，float32 乘积即可保持足够精度
+            dense = self.df[dense_cols].fillna(self.df[dense_cols].mean()).to_numpy(dtype=np.float64)
+            dense -= dense.mean(axis=0)
+            scale = dense.std(axis=0, ddof=1)
+            blocks.append((dense / np.where(scale > 0, scale, 1)).astype(np.float32))
+            means.append(np.zeros(len(dense_cols)))
+            stds.append(np.where(scale > 0, 1.0, 0.0))
+        if sparse_cols:
+            # 独热稀疏列保持稀疏，均值项在乘积之后再扣除
+            sparse = self.df[sparse_cols].sparse.to_coo().tocsc().astype(np.float32)
+            n_rows = sparse.shape[0]
+            mean = np.asarray(sparse.mean(axis=0), dtype=np.float64).ravel()
+            square_mean = np.asarray(sparse.multiply(sparse).mean(axis=0), dtype=np.float64).ravel()
+            blocks.append(sparse)
+            means.append(mean)
+            stds.append(np.sqrt(np.clip((square_mean - mean ** 2) * n_rows / max(n_rows - 1, 1), 0, None)))
+        matrix = sp.hstack(blocks, format='csc') if sparse_cols else blocks[0]
+        return matrix, dense_cols + sparse_cols, np.concatenate(means), np.concatenate(stds)
+
+    def _correlation_blocks(self, columns, block_size):
+        # 每次只计算 block_size 列与全部列的相关系数，内存占用为 block_size × p
+        matrix, names, mean, std = self._standardized_columns(columns)
+        n_rows = matrix.shape[0]
+        for start in range(0, len(names), block_size):
+            stop = min(start + block_size, len(names))
+            gram = matrix[:, start:stop].T @ matrix
+            gram = gram.toarray() if sp.issparse(gram) else gram
+            cov = (gram - n_rows * np.outer(mean[start:stop], mean)) / max(n_rows - 1, 1)
+            with np.errstate(divide='ignore', invalid='ignore'):
+                corr = cov / np.outer(std[start:stop], std)
+            corr[~np.isfinite(corr)] = np.nan
+            yield names, start, np.clip(corr, -1, 1)
+
+    def find_correlated_pairs(self, threshold=None, top_k=None, block_size=None, columns=None):
+        settings = SETTINGS['analysis']
+        if threshold is None and top_k is None:
+            threshold = settings['correlation_threshold']
+        block_size = block_size or settings['correlation_block_size']
+        if columns is None:
+            columns = [col for col in self.df.select_dtypes(include=[np.number]).columns if col != 'cluster']
+        if len(columns) < 2:
+            return None
+
+        records = {}
+        for names, start, corr in self._correlation_blocks(columns, block_size):
+            strength = np.nan_to_num(np.abs(corr), nan=-1.0)
+            rows = np.arange(corr.shape[0])
+            strength[rows, start + rows] = -1.0
+            if threshold is not None:
+                strength[strength < threshold] = -1.0
+            if top_k is not None:
+                k = min(top_k, strength.shape[1] - 1)
+                candidates = np.argpartition(-strength, k - 1, axis=1)[:, :k]
+                keep = np.zeros_like(strength, dtype=bool)
+                keep[rows[:, None], candidates] = True
+                strength[~keep] = -1.0
+            for i, j in zip(*np.nonzero(strength >= 0)):
+                pair = (min(start + i, j), max(start + i, j))
+                records[pair] = corr[i, j]
+
+        pairs = pd.DataFrame(
+            [(names[i], names[j], value) for (i, j), value in records.items()],
+            columns=['字段1', '字段2', '相关系数']
+        )
+        pairs = pairs.reindex(pairs['相关系数'].abs().sort_values(ascending=False).index).reset_index(drop=True)
+        self.results['correlated_pairs'] = pairs
+        return pairs
+
+    def correlated_submatrix(self, pairs=None, block_size=None):
+        pairs = self.results.get('correlated_pairs') if pairs is None else pairs
+        if pairs is None or pairs.empty:
+            return None
+        columns = list(dict.fromkeys(pairs['字段1'].tolist() + pairs['字段2'].tolist()))
+        blocks = list(self._correlation_blocks(columns, block_size or SETTINGS['analysis']['correlation_block_size']))
+        names = blocks[0][0]
+        matrix = pd.DataFrame(np.vstack([corr for _, _, corr in blocks]), index=names, columns=names)
+        return matrix.loc[columns, columns]
+    
+    def trend_rollups(self, date_column='日期'):
+        # 日/周/月汇总表只建一次，之后追加订单只更新受影响的周期
+        if self.rollups is None or self.rollups.date_column != date_column:
+            if self.cube is not None and date_column in self.cube.dimensions:
+                self.rollups = TrendRollups.build(self.cube.rollup([date_column]), date_column, self.cube.measures)
+            elif date_column in self.df.columns:
+                self.rollups = TrendRollups.build(self.df, date_column)
+            else:
+                return None
+        return self.rollups
+    
+    def analyze_sales_trends(self, date_column=None, granularity='日'):
+        if not date_column:
+            return None
+        rollups = self.trend_rollups(date_column)
+        if rollups is None:
+            return None
+        sales_trends = rollups.table(granularity)
+        self.results['sales_trends'] = sales_trends
+        return sales_trends
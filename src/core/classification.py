@@ -0,0 +1,120 @@
+import pandas as pd
+import numpy as np
+
+ABC_THRESHOLDS = [70, 90]
+ABC_LABELS = ['A类', 'B类', 'C类']
+XYZ_THRESHOLDS = [0.5, 1.0]
+XYZ_LABELS = ['X类', 'Y类', 'Z类', '未知']
+
+ABC_STRATEGIES = {
+    'A类': '重点管理，优化库存和定价策略',
+    'B类': '适度关注，可进行促销活动',
+    'C类': '简化管理，考虑减少库存'
+}
+XYZ_STRATEGIES = {
+    'X类': '需求稳定，按固定周期补货',
+    'Y类': '需求有波动，保留安全库存',
+    'Z类': '需求不稳定，按单采购或小批量备货',
+    '未知': '缺少分期数据，暂按销售额管理'
+}
+
+# 组合类别与策略文本只有 3×4 种，预先生成，逐行只需取整数编码
+COMBINED_LABELS = [abc[0] + xyz[0] for abc in ABC_LABELS for xyz in XYZ_LABELS]
+COMBINED_STRATEGIES = [f"{ABC_STRATEGIES[abc]}；{XYZ_STRATEGIES[xyz]}" for abc in ABC_LABELS for xyz in XYZ_LABELS]
+
+def abc_codes(cumulative_percent):
+    cumulative_percent = np.asarray(cumulative_percent, dtype=np.float64)
+    return np.select([cumulative_percent <= threshold for threshold in ABC_THRESHOLDS], [0, 1], default=2)
+
+def xyz_codes(variation):
+    variation = np.asarray(variation, dtype=np.float64)
+    return np.select(
+        [np.isnan(variation)] + [variation <= threshold for threshold in XYZ_THRESHOLDS],
+        [3, 0, 1],
+        default=2
+    )
+
+def assign_abc_classes(cumulative_percent):
+    return np.asarray(ABC_LABELS, dtype=object)[abc_codes(cumulative_percent)]
+
+def category_abc_table(category_stats, value_col='销售额'):
+    category_stats = category_stats.sort_values(value_col, ascending=False)
+    category_stats['销售额累计占比%'] = (
+        category_stats[value_col].cumsum() / category_stats[value_col].sum() * 100
+    ).round(2)
+    category_stats['ABC分类'] = assign_abc_classes(category_stats['销售额累计占比%'])
+    return category_stats
+
+def cumulative_share(values, group_codes=None):
+    # 降序排序后累计求和；分组时用 lexsort 按组排列，并扣除每组起点之前的累计值
+    values = np.asarray(values, dtype=np.float64)
+    if len(values) == 0:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float64)
+    if group_codes is None:
+        group_codes = np.zeros(len(values), dtype=np.int64)
+    order = np.lexsort((-values, group_codes))
+    sorted_values = values[order]
+    sorted_groups = group_codes[order]
+    running = np.cumsum(sorted_values)
+    starts = np.flatnonzero(np.r_[True, sorted_groups[1:] != sorted_groups[:-1]])
+    segment = np.repeat(np.arange(len(starts)), np.diff(np.r_[starts, len(values)]))
+    offset = (running[starts] - sorted_values[starts])[segment]
+    totals = np.bincount(segment, weights=sorted_values)[segment]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        share = np.where(totals != 0, (running - offset) / totals * 100, 100.0)
+    return order, share
+
+def abc_xyz_classification(df, item_col, value_col='销售额', demand_col='销售数', period_col='日期', group_col=None):
+    keys = [group_col, item_col] if group_col else [item_col]
+    item_codes, items = pd.factorize(df[item_col])
+    valid = item_codes >= 0
+    if group_col:
+        group_codes, groups = pd.factorize(df[group_col])
+        valid &= group_codes >= 0
+        # 区域与对象编码合成一个整数键，避免构造 MultiIndex
+        entity_codes, entity_keys = pd.factorize(group_codes[valid].astype(np.int64) * len(items) + item_codes[valid])
+        entity_group = entity_keys // len(items)
+        entity_item = entity_keys % len(items)
+    else:
+        entity_codes, entity_item = item_codes[valid], np.arange(len(items))
+        entity_group = None
+    n_entities = len(entity_item)
+
+    value = np.nan_to_num(pd.to_numeric(df[value_col], errors='coerce').to_numpy(dtype=np.float64)[valid])
+    totals = np.bincount(entity_codes, weights=value, minlength=n_entities)
+
+    variation = np.full(n_entities, np.nan)
+    if demand_col in df.columns and period_col and period_col in df.columns:
+        demand = np.nan_to_num(pd.to_numeric(df[demand_col], errors='coerce').to_numpy(dtype=np.float64)[valid])
+        period_codes, periods = pd.factorize(df[period_col])
+        period_codes = period_codes[valid]
+        n_periods = len(periods)
+        has_period = period_codes >= 0
+        if n_periods > 1:
+            # 每个对象在每期的需求量只对出现过的 (对象, 期) 组合求和，无需展开稠密矩阵
+            cell_codes, cell_keys = pd.factorize(entity_codes[has_period].astype(np.int64) * n_periods + period_codes[has_period])
+            cell_demand = np.bincount(cell_codes, weights=demand[has_period], minlength=len(cell_keys))
+            cell_entity = cell_keys // n_periods
+            demand_sum = np.bincount(cell_entity, weights=cell_demand, minlength=n_entities)
+            demand_square = np.bincount(cell_entity, weights=cell_demand ** 2, minlength=n_entities)
+            mean = demand_sum / n_periods
+            std = np.sqrt(np.clip(demand_square / n_periods - mean ** 2, 0, None))
+            with np.errstate(divide='ignore', invalid='ignore'):
+                variation = np.where(mean > 0, std / mean, np.nan)
+
+    order, share = cumulative_share(totals, entity_group)
+    abc = abc_codes(share)
+    xyz = xyz_codes(variation[order])
+    combined = abc * len(XYZ_LABELS) + xyz
+
+    result = pd.DataFrame({item_col: items.take(entity_item[order])})
+    if group_col:
+        result.insert(0, group_col, groups.take(entity_group[order]))
+    result[value_col] = totals[order]
+    result[f'{value_col}累计占比%'] = np.round(share, 2)
+    result['ABC分类'] = pd.Categorical.from_codes(abc, ABC_LABELS)
+    result['需求变异系数'] = np.round(variation[order], 4)
+    result['XYZ分类'] = pd.Categorical.from_codes(xyz, XYZ_LABELS)
+    result['ABC-XYZ'] = pd.Categorical.from_codes(combined, COMBINED_LABELS)
+    result['运营策略'] = pd.Categorical.from_codes(combined, COMBINED_STRATEGIES)
+    return result
@@ -0,0 +1,86 @@
+import pandas as pd
+import numpy as np
+
+CUBE_DIMENSIONS = ['商品品类', '省份', '日期']
+CUBE_MEASURES = ['销售额', '利润', '销售数']
+COUNT_COLUMN = '订单数'
+
+# 维度组合总数不超过该值时直接用 bincount 建立稠密索引，否则先排序去重
+DENSE_CELL_LIMIT = 10000000
+
+class AggregateCube:
+    def __init__(self, dimensions, measures, levels, cells, row_count):
+        self.dimensions = dimensions
+        self.measures = measures
+        self.levels = levels
+        self.cells = cells
+        self.row_count = row_count
+
+    @classmethod
+    def build(cls, df, dimensions=None, measures=None):
+        dimensions = [dim for dim in (dimensions or CUBE_DIMENSIONS) if dim in df.columns]
+        measures = [col for col in (measures or CUBE_MEASURES) if col in df.columns]
+
+        codes, levels, shape = [], {}, []
+        for dim in dimensions:
+            dim_codes, uniques = pd.factorize(df[dim], sort=True)
+            # 缺失值单独编为最后一档，上卷到其他维度时这些行仍被计入
+            codes.append(np.where(dim_codes < 0, len(uniques), dim_codes))
+            levels[dim] = pd.Index(uniques)
+            shape.append(len(uniques) + 1)
+
+        size = int(np.prod(shape)) if shape else 1
+        flat = np.ravel_multi_index(codes, shape) if codes else np.zeros(len(df), dtype=np.int64)
+        if size <= max(DENSE_CELL_LIMIT, len(df)):
+            counts = np.bincount(flat, minlength=size)
+            keys = np.flatnonzero(counts)
+            inverse = None
+        else:
+            keys, inverse = np.unique(flat, return_inverse=True)
+            counts = np.bincount(inverse, minlength=len(keys))
+
+        cells = {}
+        for dim, coords in zip(dimensions, np.unravel_index(keys, shape)):
+            cells[dim] = coords
+        for col in measures:
+            values = np.nan_to_num(pd.to_numeric(df[col], errors='coerce').to_numpy(dtype=np.float64))
+            if inverse is None:
+                cells[col] = np.bincount(flat, weights=values, minlength=size)[keys]
+            else:
+                cells[col] = np.bincount(inverse, weights=values, minlength=len(keys))
+        cells[COUNT_COLUMN] = counts[keys] if inverse is None else counts
+
+        return cls(dimensions, measures, levels, pd.DataFrame(cells), len(df))
+
+    def slice(self, **filters):
+        mask = np.ones(len(self.cells), dtype=bool)
+        for dim, values in filters.items():
+            values = values if isinstance(values, (list, tuple, set, np.ndarray, pd.Index)) else [values]
+            wanted = self.levels[dim].get_indexer(list(values))
+            mask &= np.isin(self.cells[dim].to_numpy(), wanted[wanted >= 0])
+        return AggregateCube(self.dimensions, self.measures, self.levels, self.cells[mask], self.row_count)
+
+    def rollup(self, dimensions=(), measures=None, dropna=True):
+        dimensions = [dimensions] if isinstance(dimensions, str) else list(dimensions)
+        measures = list(measures) if measures is not None else self.measures + [COUNT_COLUMN]
+        cells = self.cells
+        if dropna:
+            for dim in dimensions:
+                cells = cells[cells[dim].to_numpy() < len(self.levels[dim])]
+
+        if not dimensions:
+            return cells[measures].sum().to_frame().T
+
+        totals = cells.groupby(dimensions, sort=True)[measures].sum().reset_index()
+        for dim in dimensions:
+            codes = totals[dim].to_numpy()
+            level = self.levels[dim]
+            if dropna:
+                totals[dim] = level.take(codes)
+            else:
+                totals[dim] = level.take(np.minimum(codes, len(level) - 1)).where(codes < len(level))
+        return totals
+
+    def pivot(self, index, columns, value, fill_value=0):
+        totals = self.rollup([index, columns], [value])
+        return totals.pivot(index=index, columns=columns, values=value).fillna(fill_value)
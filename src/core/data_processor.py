@@ -6,133 +6,297 @@ from sklearn.ensemble import RandomForestRegressor
 from sklearn.neighbors import KNeighborsRegressor
 from sklearn.model_selection import train_test_split
 from sklearn.metrics import mean_squared_error
+from config.constants import CONSTANTS
+from config.settings import SETTINGS
+from src.core.profiler import profile_dataframe
+from src.core.regions import enrich_regions
+from src.utils.cache_utils import dataset_fingerprint
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+# 可选负号、可选货币符号，取第一个数字：“¥1,299.00”“12.5%”“约300元”“¥-12”
+NUMBER_PATTERN = r'(?P<sign>-?)[¥￥$]?(?P<num>\d+(?:\.\d*)?|\.\d+)'
+SEPARATOR_PATTERN = r'[,，\s]'
+
+def _parse_arrow_strings(array):
+    text = pc.replace_substring_regex(array, SEPARATOR_PATTERN, '')
+    matched = pc.extract_regex(text, NUMBER_PATTERN)
+    number = pc.cast(pc.struct_field(matched, 'num'), pa.float64())
+    negative = pc.equal(pc.struct_field(matched, 'sign'), '-')
+    return pc.if_else(negative, pc.negate(number), number)
+
+def _parse_pandas_strings(values):
+    text = pd.Series(values, dtype=object).str.replace(SEPARATOR_PATTERN, '', regex=True)
+    matched = text.str.extract(NUMBER_PATTERN)
+    number = pd.to_numeric(matched['num'], errors='coerce').to_numpy(dtype=float)
+    return np.where(matched['sign'].to_numpy() == '-', -number, number)
+
+def _parse_mixed_values(values):
+    # 字符串与数字混合的列：数字直接转换，字符串去重后按正则解析
+    codes, uniques = pd.factorize(values, use_na_sentinel=True)
+    uniques = np.asarray(uniques, dtype=object)
+    is_text = np.fromiter((isinstance(value, str) for value in uniques), dtype=bool, count=len(uniques))
+
+    parsed = np.full(len(uniques) + 1, np.nan)
+    parsed[:-1][~is_text] = pd.to_numeric(pd.Series(uniques[~is_text], dtype=object), errors='coerce')
+    parsed[:-1][is_text] = _parse_pandas_strings(uniques[is_text])
+    # 缺失值编码为 -1，正好取到末尾的 NaN
+    return parsed[codes]
+
+def _parse_object_values(values):
+    if not PYARROW_AVAILABLE or pd.api.types.infer_dtype(values, skipna=True) not in ('string', 'empty'):
+        return _parse_mixed_values(values)
+
+    # 在 Arrow 中字典编码，只对去重后的字典做正则解析，再按索引取回
+    array = pa.array(values, type=pa.string(), from_pandas=True)
+    chunks = array.chunks if isinstance(array, pa.ChunkedArray) else [array]
+    parsed = []
+    for chunk in chunks:
+        encoded = pc.dictionary_encode(chunk)
+        numbers = _parse_arrow_strings(encoded.dictionary)
+        parsed.append(pc.take(numbers, encoded.indices).to_numpy(zero_copy_only=False))
+    return np.concatenate(parsed) if parsed else np.empty(0)
+
+def parse_numeric_columns(df, columns, percent_columns=()):
+    # 所有匹配列拼接成一个数组，一次解析完成后再按列切分
+    columns = list(columns)
+    if not columns:
+        return {}
+
+    stacked = np.concatenate([df[col].to_numpy(dtype=object) for col in columns])
+    values = _parse_object_values(stacked)
+
+    result = {}
+    for i, col in enumerate(columns):
+        column_values = values[i * len(df):(i + 1) * len(df)]
+        if col in percent_columns:
+            column_values = column_values / 100
+        result[col] = pd.Series(column_values, index=df.index, name=col)
+    return result
+
+def parse_numeric_strings(series, percent=False):
+    frame = pd.DataFrame({'value': series})
+    parsed = parse_numeric_columns(frame, ['value'], ['value'] if percent else ())['value']
+    return parsed.rename(series.name)
+
+SCALERS = {
+    'zscore': StandardScaler,
+    'minmax': lambda: MinMaxScaler(feature_range=(0, 1))
+}
 
 class DataProcessor:
-    def __init__(self):
+    def __init__(self, model_store=None):
         self.scalers = {}
         self.encoders = {}
+        self.model_store = model_store
         self.column_types = {}
+        self._profile = None
+        self._profile_fingerprint = None
+    
+    def profile(self, df):
+        # 内容相同的数据只扫描一次，类型推断、列统计和缺失值报告共用该结果；
+        # 按内容指纹而不是对象身份判断，原地修改取值后会重新扫描
+        fingerprint = dataset_fingerprint(df)
+        if self._profile is None or self._profile_fingerprint != fingerprint:
+            self._profile = profile_dataframe(df)
+            self._profile_fingerprint = fingerprint
+        return self._profile
     
     def clean_numeric_columns(self, df):
         df_clean = df.copy()
         
-        price_keywords = ['价格', '售价', '金额', '销售额', '利润', '成本']
+        price_keywords = CONSTANTS['PRICE_KEYWORDS']
         price_cols = [col for col in df.columns if any(kw in col for kw in price_keywords)]
         
-        for col in price_cols:
-            if df_clean[col].dtype == 'object':
-                df_clean[col] = df_clean[col].astype(str).str.replace(r'[^\d.]', '', regex=True)
-                df_clean[col] = pd.to_numeric(df_clean[col], errors='coerce')
-        
-        percent_keywords = ['率', '百分比', '占比']
-        percent_cols = [col for col in df.columns if any(kw in col for kw in percent_keywords)]
-        for col in percent_cols:
-            if df_clean[col].dtype == 'object':
-                df_clean[col] = df_clean[col].astype(str).str.replace(r'[%]', '', regex=True)
-                df_clean[col] = pd.to_numeric(df_clean[col], errors='coerce') / 100
+        percent_keywords = CONSTANTS['PERCENT_KEYWORDS']
+        percent_cols = [col for col in df.columns if any(kw in col for kw in percent_keywords) and col not in price_cols]
+
+        object_cols = [col for col in price_cols + percent_cols if df_clean[col].dtype == 'object']
+        parsed = parse_numeric_columns(df_clean, object_cols, percent_columns=percent_cols)
+        for col, values in parsed.items():
+            df_clean[col] = values
         
         return df_clean
     
-    def auto_detect_column_types(self, df):
-        column_types = {
-            'numeric': [],
-            'ordinal': [],
-            'nominal': [],
-            'identifier': []
-        }
-
-        id_keywords = ['id', '订单号', '日期', '编号', '序号']
-        for col in df.columns:
-            col_lower = col.lower()
-            if any(keyword in col_lower for keyword in id_keywords) or (df[col].nunique() / len(df) > 0.8):
-                column_types['identifier'].append(col)
-                continue
+    def compact_dtypes(self, df, category_max_ratio=None, float_atol=None):
+        settings = SETTINGS['data_processing']
+        category_max_ratio = settings['category_max_ratio'] if category_max_ratio is None else category_max_ratio
+        float_atol = settings['float32_atol'] if float_atol is None else float_atol
 
-        numeric_cols = df.select_dtypes(include=[np.number]).columns.tolist()
-        column_types['numeric'] = [col for col in numeric_cols if col not in column_types['identifier']]
+        df_compact = df.copy(deep=False)
+        rows = len(df)
+        int32 = np.iinfo(np.int32)
+        # 金额与比例列会被求和、加权汇总，逐值误差虽小，百万行累计后也会偏差数百元，始终保留 float64
+        exact_keywords = CONSTANTS['PRICE_KEYWORDS'] + CONSTANTS['PERCENT_KEYWORDS']
 
-        categorical_cols = df.select_dtypes(exclude=[np.number]).columns.tolist()
-        categorical_cols = [col for col in categorical_cols if col not in column_types['identifier']]
+        for col in df.columns:
+            series = df[col]
+            if series.dtype == 'object':
+                if rows and series.nunique(dropna=True) / rows <= category_max_ratio:
+                    df_compact[col] = series.astype('category')
+            elif pd.api.types.is_integer_dtype(series.dtype) and series.dtype.itemsize > 4:
+                # 不降到 int8/int16，避免后续乘法运算溢出
+                if rows == 0 or (series.min() >= int32.min and series.max() <= int32.max):
+                    df_compact[col] = series.astype(np.int32)
+            elif series.dtype == np.float64 and not any(kw in str(col) for kw in exact_keywords):
+                values = series.to_numpy()
+                with np.errstate(over='ignore', invalid='ignore'):
+                    error = np.abs(values.astype(np.float32).astype(np.float64) - values)
+                # 精度保护：float32 往返误差不超过 float_atol 才降精度
+                if not np.any(error > float_atol):
+                    df_compact[col] = series.astype(np.float32)
 
-        ordinal_keywords = ['等级', '年龄', '评分', '段位', '层次']
-        for col in categorical_cols:
-            if any(keyword in col for keyword in ordinal_keywords):
-                column_types['ordinal'].append(col)
-            else:
-                column_types['nominal'].append(col)
+        before = df.memory_usage(index=False, deep=True)
+        after = df_compact.memory_usage(index=False, deep=True)
+        report = pd.DataFrame({
+            '字段名': df.columns,
+            '原类型': df.dtypes.astype(str).values,
+            '压缩后类型': df_compact.dtypes.astype(str).values,
+            '原内存(MB)': (before / 1024 ** 2).round(3).values,
+            '压缩后内存(MB)': (after / 1024 ** 2).round(3).values
+        })
+        report.loc[len(report)] = ['合计', '', '', round(before.sum() / 1024 ** 2, 3), round(after.sum() / 1024 ** 2, 3)]
+        return df_compact, report
+    
+    def _fit_estimator(self, name, estimator, frame):
+        # 配置了模型存储时，相同数据与参数的拟合结果直接加载，不再重新拟合
+        if self.model_store is None:
+            return estimator.fit(frame)
+        key = self.model_store.model_key(name, frame, estimator)
+        return self.model_store.get_or_fit(key, lambda: estimator.fit(frame))
+    
+    def scale_numeric(self, df, columns=None, method='zscore', fit=True):
+        if fit:
+            scaler = self._fit_estimator(f"{method}_scaler", SCALERS[method](), df[list(columns)])
+            self.scalers[method] = scaler
+        elif method not in self.scalers:
+            raise ValueError(f"尚未拟合 {method} 标准化器，请先以 fit=True 调用")
+        else:
+            scaler = self.scalers[method]
         
+        # 新批次按拟合时的列顺序变换
+        columns = list(scaler.feature_names_in_)
+        df_scaled = df.copy()
+        df_scaled[columns] = scaler.transform(df[columns])
+        return df_scaled
+    
+    def enrich_regions(self, df, column='区域'):
+        return enrich_regions(df, column=column)
+    
+    def clean_numeric_chunks(self, chunks):
+        for chunk in chunks:
+            yield self.clean_numeric_columns(chunk)
+    
+    def auto_detect_column_types(self, df):
+        column_types = self.profile(df).column_types()
         self.column_types = column_types
         return column_types
     
-    def process_categorical_variables(self, df, column_types=None, fit_encoder=True):
-        if column_types is None:
-            column_types = self.auto_detect_column_types(df)
+    def process_categorical_variables(self, df, column_types=None, fit_encoder=True, sparse=False):
+        if fit_encoder:
+            if column_types is None:
+                column_types = self.auto_detect_column_types(df)
+            encoders = {}
+            if column_types['ordinal']:
+                encoders['ordinal'] = self._fit_estimator(
+                    'ordinal_encoder',
+                    OrdinalEncoder(handle_unknown='use_encoded_value', unknown_value=-1),
+                    df[column_types['ordinal']]
+                )
+            if column_types['nominal']:
+                encoders['onehot'] = self._fit_estimator(
+                    'onehot_encoder',
+                    OneHotEncoder(sparse_output=sparse, drop='first', handle_unknown='ignore'),
+                    df[column_types['nominal']]
+                )
+            self.encoders = encoders
+        elif not self.encoders:
+            raise ValueError("尚未拟合编码器，请先以 fit_encoder=True 调用")
+        else:
+            # 新批次直接用已拟合的编码器变换，列取自拟合时的 feature_names_in_
+            encoders = self.encoders
             
-        df_processed = df.copy()
-        encoders = {}
+        # 只追加编码列，不修改原表，无需先整体复制
+        df_processed = df
 
-        if column_types['ordinal'] and fit_encoder:
-            ordinal_encoder = OrdinalEncoder(handle_unknown='use_encoded_value', unknown_value=-1)
-            df_ordinal = ordinal_encoder.fit_transform(df_processed[column_types['ordinal']])
+        if 'ordinal' in encoders:
+            ordinal_encoder = encoders['ordinal']
+            ordinal_cols = list(ordinal_encoder.feature_names_in_)
+            df_ordinal = ordinal_encoder.transform(df_processed[ordinal_cols])
             df_ordinal = pd.DataFrame(
                 df_ordinal,
-                columns=[f"{col}_编码" for col in column_types['ordinal']],
+                columns=[f"{col}_编码" for col in ordinal_cols],
                 index=df_processed.index
             )
             df_processed = pd.concat([df_processed, df_ordinal], axis=1)
-            encoders['ordinal'] = ordinal_encoder
-
-        if column_types['nominal'] and fit_encoder:
-            onehot_encoder = OneHotEncoder(sparse_output=False, drop='first', handle_unknown='ignore')
-            df_onehot = onehot_encoder.fit_transform(df_processed[column_types['nominal']])
-            feature_names = []
-            for i, col in enumerate(column_types['nominal']):
-                categories = onehot_encoder.categories_[i][1:]
-                feature_names.extend([f"{col}_{cat}" for cat in categories])
-            df_onehot = pd.DataFrame(
-                df_onehot,
-                columns=feature_names,
-                index=df_processed.index
-            )
+
+        if 'onehot' in encoders:
+            # 城市、SKU 等高基数字段展开后列数很多，稀疏模式下以 CSR 编码并保存为 pandas 稀疏列
+            onehot_encoder = encoders['onehot']
+            nominal_cols = list(onehot_encoder.feature_names_in_)
+            df_onehot = onehot_encoder.transform(df_processed[nominal_cols])
+            feature_names = onehot_encoder.get_feature_names_out(nominal_cols).tolist()
+            if sparse and hasattr(df_onehot, 'tocsr'):
+                df_onehot = pd.DataFrame.sparse.from_spmatrix(
+                    df_onehot.tocsr(),
+                    index=df_processed.index,
+                    columns=feature_names
+                )
+            else:
+                df_onehot = pd.DataFrame(
+                    df_onehot.toarray() if hasattr(df_onehot, 'toarray') else df_onehot,
+                    columns=feature_names,
+                    index=df_processed.index
+                )
             df_processed = pd.concat([df_processed, df_onehot], axis=1)
-            encoders['onehot'] = onehot_encoder
             encoders['onehot_features'] = feature_names
 
+        if df_processed is df:
+            df_processed = df.copy()
         return df_processed, encoders
     
     def get_column_statistics(self, df):
         if not self.column_types:
             self.auto_detect_column_types(df)
             
+        table = self.profile(df).table
         stats = {}
         for col_type, columns in self.column_types.items():
             for col in columns:
-                if col in df.columns:
+                if col in table.index:
+                    profile = table.loc[col]
                     if col_type == 'numeric':
                         stats[col] = {
                             'type': 'numeric',
-                            'mean': df[col].mean(),
-                            'std': df[col].std(),
-                            'min': df[col].min(),
-                            'max': df[col].max(),
-                            'missing': df[col].isnull().sum()
+                            'mean': profile['mean'],
+                            'std': profile['std'],
+                            'min': profile['min'],
+                            'max': profile['max'],
+                            'missing': profile['missing']
                         }
                     else:
                         stats[col] = {
                             'type': col_type,
-                            'unique_count': df[col].nunique(),
-                            'missing': df[col].isnull().sum(),
-                            'sample_values': df[col].dropna().unique()[:5].tolist()
+                            'unique_count': profile['distinct'],
+                            'missing': profile['missing'],
+                            'sample_values': profile['sample_values']
                         }
         return stats
     
     def generate_missing_value_report(self, df):
+        profile = self.profile(df)
+        table = profile.table
         missing_stats = pd.DataFrame({
             '字段名': df.columns,
             '数据类型': df.dtypes.values,
-            '总行数': len(df),
-            '非空值数量': df.notnull().sum(),
-            '缺失值数量': df.isnull().sum(),
-            '缺失比例%': (df.isnull().sum() / len(df) * 100).round(2)
+            '总行数': profile.row_count,
+            '非空值数量': table['non_null'].astype('int64'),
+            '缺失值数量': table['missing'].astype('int64'),
+            '缺失比例%': (table['missing'].astype('int64') / profile.row_count * 100).round(2)
         })
         return missing_stats
@@ -0,0 +1,64 @@
+import pandas as pd
+import numpy as np
+
+SENSITIVITY_LEVELS = [(-0.3, '高敏感'), (-0.1, '中敏感')]
+DEFAULT_LEVEL = '低敏感'
+
+def _group_sum(codes, values, n_groups):
+    return np.bincount(codes, weights=values, minlength=n_groups)
+
+def _centered_moments(codes, x, y, mask, n_groups):
+    # 先求组内均值再对离差求和，避免大数值直接求平方和带来的精度损失
+    codes, x, y = codes[mask], x[mask], y[mask]
+    count = np.bincount(codes, minlength=n_groups)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        mean_x = _group_sum(codes, x, n_groups) / count
+        mean_y = _group_sum(codes, y, n_groups) / count
+    dx = x - mean_x[codes]
+    dy = y - mean_y[codes]
+    return count, _group_sum(codes, dx * dx, n_groups), _group_sum(codes, dx * dy, n_groups), _group_sum(codes, dy * dy, n_groups)
+
+def assign_sensitivity_levels(correlation):
+    correlation = np.asarray(correlation, dtype=np.float64)
+    conditions = [correlation < threshold for threshold, _ in SENSITIVITY_LEVELS]
+    return np.select(conditions, [level for _, level in SENSITIVITY_LEVELS], default=DEFAULT_LEVEL)
+
+def grouped_price_sensitivity(df, group_col='商品品类', price_col='实际售价', quantity_col='销售数', min_count=5):
+    codes, groups = pd.factorize(df[group_col])
+    keep = codes >= 0
+    codes = codes[keep]
+    price = pd.to_numeric(df[price_col], errors='coerce').to_numpy(dtype=np.float64)[keep]
+    quantity = pd.to_numeric(df[quantity_col], errors='coerce').to_numpy(dtype=np.float64)[keep]
+    n_groups = len(groups)
+
+    # 所有分组的统计量均由 bincount 一次性按组求和得到，不再逐组筛选整表
+    rows = np.bincount(codes, minlength=n_groups)
+    price_valid = ~np.isnan(price)
+    quantity_valid = ~np.isnan(quantity)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        mean_price = _group_sum(codes[price_valid], price[price_valid], n_groups) / np.bincount(codes[price_valid], minlength=n_groups)
+        mean_quantity = _group_sum(codes[quantity_valid], quantity[quantity_valid], n_groups) / np.bincount(codes[quantity_valid], minlength=n_groups)
+
+    pair_count, sxx, sxy, syy = _centered_moments(codes, price, quantity, price_valid & quantity_valid, n_groups)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        correlation = np.where(pair_count > 1, sxy / np.sqrt(sxx * syy), np.nan)
+
+    # 对数-对数回归斜率即价格弹性，只使用价格与销量均为正的记录
+    positive = price_valid & quantity_valid & (price > 0) & (quantity > 0)
+    log_price = np.log(np.where(positive, price, 1.0))
+    log_quantity = np.log(np.where(positive, quantity, 1.0))
+    log_count, lxx, lxy, _ = _centered_moments(codes, log_price, log_quantity, positive, n_groups)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        elasticity = np.where((log_count > 1) & (lxx > 0), lxy / lxx, np.nan)
+
+    correlation = np.where(np.isfinite(correlation), np.clip(correlation, -1, 1), np.nan)
+    result = pd.DataFrame({
+        group_col: groups,
+        '价格销量相关性': np.round(correlation, 4),
+        '价格弹性': np.round(elasticity, 4),
+        '敏感度等级': assign_sensitivity_levels(correlation),
+        '平均价格': np.round(mean_price, 2),
+        '平均销量': np.round(mean_quantity, 2),
+        '记录数': rows
+    })
+    return result[rows >= min_count].reset_index(drop=True)
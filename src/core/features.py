@@ -0,0 +1,98 @@
+import threading
+import pandas as pd
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from config.settings import SETTINGS
+
+def complete_days(daily):
+    # 缺失的日期补 0，保证第 t 行的滞后 k 正好是 k 天前
+    daily = daily.groupby(level=0).sum().sort_index()
+    index = daily.index
+    if len(index) == 0:
+        return daily
+    if pd.api.types.is_datetime64_any_dtype(index):
+        full = pd.date_range(index.min(), index.max(), freq='D')
+    elif pd.api.types.is_numeric_dtype(index) and np.all(np.mod(index.to_numpy(dtype=np.float64), 1) == 0):
+        full = np.arange(index.min(), index.max() + 1).astype(index.dtype)
+    else:
+        return daily
+    return daily.reindex(full, fill_value=0).rename_axis(daily.index.name)
+
+def calendar_features(days):
+    if pd.api.types.is_datetime64_any_dtype(days):
+        days = pd.DatetimeIndex(days)
+        return {'星期': days.dayofweek.to_numpy(), '月内日': days.day.to_numpy(), '月份': days.month.to_numpy()}
+    # 整数日期（1..30）没有真实星期信息，只能给出 7 天周期内的位置
+    days = np.asarray(days, dtype=np.int64)
+    return {'周内位置': (days - 1) % 7, '月内日': days}
+
+def window_features(values, start, lags, windows):
+    # 第 t 行只用 t 之前的值：窗口视图第 t 行即 values[t - max_back:t]，不足部分以 NaN 填充
+    max_back = max(list(lags) + list(windows))
+    n_rows = len(values) - start
+    if n_rows <= 0:
+        return {}
+    context_start = max(0, start - max_back)
+    padded = np.concatenate([np.full(max_back - (start - context_start), np.nan), values[context_start:]])
+    view = sliding_window_view(padded[:-1], max_back)
+
+    columns = {}
+    for lag in lags:
+        columns[f"滞后{lag}日"] = view[:, -lag]
+    for window in windows:
+        recent = view[:, -window:]
+        columns[f"{window}日均值"] = recent.mean(axis=1)
+        columns[f"{window}日标准差"] = recent.std(axis=1, ddof=1) if window > 1 else np.zeros(n_rows)
+    return columns
+
+def roll_forward(history, days, lags, windows, predict):
+    # 预测期不能用真实值：每一天的滞后与滚动特征由训练期历史加上此前各天的预测值生成
+    values = np.asarray(history, dtype=np.float64)
+    predictions, rows = [], []
+    for step in range(len(days)):
+        columns = window_features(np.append(values, np.nan), len(values), lags, windows)
+        columns.update(calendar_features(days[step:step + 1]))
+        row = pd.DataFrame(columns, index=days[step:step + 1])
+        prediction = float(predict(step, row))
+        values = np.append(values, prediction)
+        predictions.append(prediction)
+        rows.append(row)
+    features = pd.concat(rows) if rows else pd.DataFrame()
+    return np.asarray(predictions, dtype=np.float64), features
+
+class DailyFeatureStore:
+    def __init__(self, lags=None, windows=None):
+        settings = SETTINGS['forecasting']
+        self.lags = sorted(set(lags or settings['feature_lags']))
+        self.windows = sorted(set(windows or settings['rolling_windows']))
+        self.days = None
+        self.values = np.empty(0)
+        self.features = None
+        self.computed_rows = 0
+        # 同一会话的多个后台任务可能共用一个存储，更新需要串行
+        self._lock = threading.Lock()
+
+    def update(self, daily):
+        with self._lock:
+            return self._update(daily)
+
+    def _update(self, daily):
+        daily = complete_days(daily)
+        days, values = daily.index, daily.to_numpy(dtype=np.float64)
+
+        # 已有日期的值未变化时只计算新增日期；历史值被修改则从最早变化的一天起重算
+        n_old = len(self.values)
+        start = 0
+        if self.days is not None and n_old and len(days) >= n_old and days[:n_old].equals(self.days):
+            changed = np.flatnonzero(values[:n_old] != self.values)
+            start = int(changed[0]) if len(changed) else n_old
+
+        columns = window_features(values, start, self.lags, self.windows)
+        columns.update(calendar_features(days[start:]))
+        new_rows = pd.DataFrame(columns, index=days[start:])
+        if start and self.features is not None:
+            new_rows = pd.concat([self.features.iloc[:start], new_rows])
+        self.features = new_rows
+        self.days, self.values = days, values
+        self.computed_rows = len(days) - start
+        return self.features
@@ -0,0 +1,131 @@
+import time
+import pandas as pd
+import numpy as np
+from config.constants import CONSTANTS
+from config.settings import SETTINGS
+from src.core.data_processor import DataProcessor, SCALERS
+from src.core.streaming import ChunkAggregator, concat_chunks
+from src.core.rollups import TrendRollups
+from src.core.classification import category_abc_table
+from src.utils.cache_utils import dataset_fingerprint, hash_bytes
+
+class IncrementalDataset:
+    def __init__(self, processor=None, date_column='日期', category_column='商品品类', encode=False):
+        self.processor = processor or DataProcessor()
+        self.date_column = date_column
+        self.category_column = category_column
+        self.encode = encode
+        self.chunks = []
+        self.aggregator = ChunkAggregator(group_keys=[category_column])
+        self.rollups = None
+        self.scale_columns = None
+        self.fingerprint = None
+        self.batch_keys = set()
+        self.append_log = []
+        self._data = None
+
+    @classmethod
+    def from_frame(cls, df, fingerprint=None, **kwargs):
+        # 已清洗的历史数据只累计一次统计量，不重复清洗
+        dataset = cls(**kwargs)
+        dataset._fold(df, fingerprint or dataset_fingerprint(df))
+        return dataset
+
+    @property
+    def row_count(self):
+        return self.aggregator.row_count
+
+    @property
+    def data(self):
+        if self._data is None and self.chunks:
+            self._data = concat_chunks(self.chunks)
+        return self._data
+
+    def prepare(self, batch):
+        # 新批次走与上传时相同的清洗、区域补充与编码流程；编码器只在第一次拟合
+        prepared = self.processor.enrich_regions(self.processor.clean_numeric_columns(batch))
+        if self.encode:
+            prepared, _ = self.processor.process_categorical_variables(prepared, fit_encoder=not self.processor.encoders)
+        if SETTINGS['data_processing']['compact_dtypes']:
+            prepared, _ = self.processor.compact_dtypes(prepared)
+            prepared = self._match_history_dtypes(prepared)
+        return prepared
+
+    def _match_history_dtypes(self, batch):
+        # 小批次的基数比例、取值范围与历史不同，单独压缩得到的类型可能不一致；
+        # 按历史数据的类别列与 int32 列对齐，拼接后不会退化为 object/int64
+        if not self.chunks:
+            return batch
+        history = self.chunks[0]
+        int32 = np.iinfo(np.int32)
+        for col in batch.columns:
+            if col not in history.columns:
+                continue
+            target, series = history[col].dtype, batch[col]
+            if isinstance(target, pd.CategoricalDtype) and not isinstance(series.dtype, pd.CategoricalDtype):
+                batch[col] = series.astype('category')
+            elif target == np.int32 and pd.api.types.is_integer_dtype(series.dtype) and series.dtype.itemsize > 4:
+                if len(series) == 0 or (series.min() >= int32.min and series.max() <= int32.max):
+                    batch[col] = series.astype(np.int32)
+        return batch
+
+    def append(self, batch, batch_key=None):
+        if batch_key is not None and batch_key in self.batch_keys:
+            return None
+        start = time.perf_counter()
+        prepared = self.prepare(batch)
+        self._fold(prepared, dataset_fingerprint(prepared))
+        if batch_key is not None:
+            self.batch_keys.add(batch_key)
+        self.append_log.append({'批次': len(self.append_log) + 1, '行数': len(prepared), '耗时(秒)': time.perf_counter() - start})
+        return prepared
+
+    def _fold(self, batch, batch_fingerprint):
+        # 所有依赖状态都只在本批次上更新：缺失计数与品类合计相加、趋势表按周期累加、标准化器 partial_fit
+        self.aggregator.update(batch)
+        if self.date_column in batch.columns:
+            if self.rollups is None:
+                self.rollups = TrendRollups.build(batch, self.date_column)
+            else:
+                self.rollups.append(batch)
+
+        if self.scale_columns is None:
+            self.scale_columns = [
+                col for col in CONSTANTS['STANDARDIZE_COLUMNS']
+                if col in batch.columns and pd.api.types.is_numeric_dtype(batch[col])
+            ]
+        if self.scale_columns:
+            for method, make_scaler in SCALERS.items():
+                scaler = self.processor.scalers.get(method) or make_scaler()
+                self.processor.scalers[method] = scaler.partial_fit(batch[self.scale_columns].astype(np.float64))
+
+        self.chunks.append(batch)
+        self._data = None
+        self.fingerprint = batch_fingerprint if self.fingerprint is None else hash_bytes(
+            f"{self.fingerprint}{batch_fingerprint}".encode('utf-8')
+        )
+
+    def missing_value_report(self):
+        return self.aggregator.missing_value_report()
+
+    def abc_classification(self):
+        totals = self.aggregator.get_group_totals(self.category_column)
+        if totals is None or '销售额' not in totals.columns:
+            return None
+        return category_abc_table(totals[[col for col in [self.category_column, '销售额', '利润'] if col in totals.columns]])
+
+    def sales_trends(self, granularity='日'):
+        return None if self.rollups is None else self.rollups.table(granularity)
+
+    def standardization_stats(self):
+        if not self.scale_columns:
+            return None
+        zscore, minmax = self.processor.scalers['zscore'], self.processor.scalers['minmax']
+        return pd.DataFrame({
+            '字段名': self.scale_columns,
+            '样本数': np.broadcast_to(zscore.n_samples_seen_, len(self.scale_columns)),
+            '均值': zscore.mean_,
+            '标准差': zscore.scale_,
+            '最小值': minmax.data_min_,
+            '最大值': minmax.data_max_
+        })
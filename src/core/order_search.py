@@ -0,0 +1,128 @@
+import os
+import time
+import warnings
+import pandas as pd
+import numpy as np
+from statsmodels.tsa.arima.model import ARIMA
+from statsmodels.tsa.stattools import kpss
+from config.settings import SETTINGS
+from src.utils.job_scheduler import process_pool
+
+def select_differencing(y, max_d=2, alpha=0.05):
+    # 不同差分阶数下的 AIC 不可比，先用 KPSS 检验确定 d，只在固定 d 的平面上搜索 p、q
+    series = np.asarray(y, dtype=np.float64)
+    for d in range(max_d + 1):
+        if len(series) < 8 or np.ptp(series) == 0:
+            return d
+        try:
+            with warnings.catch_warnings():
+                warnings.simplefilter('ignore')
+                if kpss(series, regression='c', nlags='auto')[1] >= alpha:
+                    return d
+        except Exception:
+            return d
+        series = np.diff(series)
+    return max_d
+
+def _warm_start(model, y, parent_params):
+    # 相邻阶数的参数按名称复制（ar.L1、ma.L1、sigma2 等），多出的滞后项从 0 开始
+    if not parent_params:
+        return None
+    default_sigma2 = float(np.var(np.diff(y))) if len(y) > 1 else 1.0
+    return np.array([
+        parent_params.get(name, default_sigma2 if name == 'sigma2' else 0.0)
+        for name in model.param_names
+    ])
+
+def _fit_order(y, order, parent_params=None):
+    start = time.perf_counter()
+    try:
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore')
+            model = ARIMA(y, order=order)
+            start_params = _warm_start(model, y, parent_params)
+            fit = None
+            if start_params is not None:
+                try:
+                    fit = model.fit(start_params=start_params, cov_type='none')
+                except Exception:
+                    fit = None
+            # 热启动失败或发散时退回默认初值重新拟合
+            if fit is None or not np.isfinite(fit.aic):
+                fit = model.fit(cov_type='none')
+        aic = float(fit.aic)
+        params = dict(zip(model.param_names, np.asarray(fit.params, dtype=np.float64)))
+        error = None if np.isfinite(aic) else "AIC 为非有限值"
+    except Exception as e:
+        aic, params, error = np.inf, None, f"{type(e).__name__}: {e}"
+    return order, aic if error is None else np.inf, params, error, time.perf_counter() - start
+
+def _neighbours(order, max_p, max_q):
+    p, d, q = order
+    steps = [(1, 0), (-1, 0), (0, 1), (0, -1), (1, 1), (-1, -1)]
+    return [(p + dp, d, q + dq) for dp, dq in steps if 0 <= p + dp <= max_p and 0 <= q + dq <= max_q]
+
+def search_arima_order(y, max_p=None, max_d=None, max_q=None, max_fits=None, max_workers=None, tol=None):
+    settings = SETTINGS['forecasting']
+    max_p = settings['order_search_max_p'] if max_p is None else max_p
+    max_d = settings['order_search_max_d'] if max_d is None else max_d
+    max_q = settings['order_search_max_q'] if max_q is None else max_q
+    max_fits = max_fits or settings['order_search_max_fits']
+    max_workers = max_workers or settings['order_search_workers'] or os.cpu_count() or 1
+    tol = settings['order_search_tol'] if tol is None else tol
+
+    y = np.asarray(y, dtype=np.float64)
+    start = time.perf_counter()
+    d = select_differencing(y, max_d)
+    # 参数个数不少于有效样本数的阶数无法估计，直接剪掉
+    feasible = lambda order: order[0] + order[2] + 2 < len(y) - order[1]
+
+    # 逐步搜索：先并行拟合几个常用起点，之后每轮只评估当前最优阶数的邻居，
+    # 邻居以最优模型参数热启动；一轮内没有任何邻居使 AIC 改善超过 tol 即停止
+    candidates = [(min(2, max_p), d, min(2, max_q)), (0, d, 0), (min(1, max_p), d, 0), (0, d, min(1, max_q))]
+    evaluated = {}
+    best = None
+    executor = process_pool(max_workers) if max_workers > 1 else None
+    try:
+        while len(evaluated) < max_fits:
+            orders = list(dict.fromkeys(order for order in candidates if order not in evaluated and feasible(order)))
+            orders = orders[:max_fits - len(evaluated)]
+            if not orders:
+                break
+            parent_params = evaluated[best][1] if best is not None else None
+            if executor is None or len(orders) == 1:
+                outcomes = [_fit_order(y, order, parent_params) for order in orders]
+            else:
+                outcomes = list(executor.map(_fit_order, [y] * len(orders), orders, [parent_params] * len(orders)))
+            for order, aic, params, error, seconds in outcomes:
+                evaluated[order] = (aic, params, error, seconds)
+
+            round_best = min(evaluated, key=lambda order: evaluated[order][0])
+            if best is not None and not evaluated[round_best][0] < evaluated[best][0] - tol:
+                break
+            best = round_best
+            candidates = _neighbours(best, max_p, max_q)
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+    table = pd.DataFrame([
+        {'p': order[0], 'd': order[1], 'q': order[2], 'AIC': aic, '耗时(秒)': seconds, '错误': error}
+        for order, (aic, params, error, seconds) in evaluated.items()
+    ]).sort_values('AIC', kind='stable').reset_index(drop=True)
+
+    if best is None or not np.isfinite(evaluated[best][0]):
+        best_order, best_aic, best_params = tuple(settings['arima_order']), np.inf, None
+    else:
+        best_order, best_aic, best_params = best, evaluated[best][0], evaluated[best][1]
+    return {
+        'order': best_order,
+        'aic': best_aic,
+        'params': best_params,
+        'candidates': table,
+        'fits': len(evaluated),
+        'grid_size': (max_p + 1) * (max_d + 1) * (max_q + 1),
+        'fit_seconds': float(table['耗时(秒)'].sum()) if len(table) else 0.0,
+        'elapsed_seconds': time.perf_counter() - start,
+        'workers': max_workers
+    }
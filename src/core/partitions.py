@@ -0,0 +1,219 @@
+import os
+import re
+import time
+from itertools import repeat
+import pandas as pd
+from config.settings import SETTINGS
+from src.core.data_processor import DataProcessor
+from src.core.streaming import concat_chunks
+from src.utils.cache_utils import DatasetCache
+from src.utils.data_utils import read_excel_fast
+from src.utils.job_scheduler import process_pool
+
+try:
+    import pyarrow.parquet as pq
+    PARQUET_AVAILABLE = True
+except ImportError:
+    PARQUET_AVAILABLE = False
+
+PARTITION_EXTENSIONS = ('.csv', '.xlsx', '.parquet')
+FILTER_OPERATORS = ('==', '!=', '<', '<=', '>', '>=', 'in', 'not in')
+
+def union_columns(*column_lists):
+    # 任一方需要全部列（None）时结果也为 None，否则按出现顺序合并去重
+    if any(columns is None for columns in column_lists):
+        return None
+    return list(dict.fromkeys(col for columns in column_lists for col in columns))
+
+def _coerce(value, like):
+    # 分区值来自路径，都是字符串；与数值比较时先转换，无法转换的保持原样
+    if isinstance(like, (int, float)) and not isinstance(like, bool) and isinstance(value, str):
+        try:
+            return float(value)
+        except ValueError:
+            return value
+    return value
+
+def _compare(left, op, right):
+    if op == '==':
+        return left == right
+    if op == '!=':
+        return left != right
+    if op == '<':
+        return left < right
+    if op == '<=':
+        return left <= right
+    if op == '>':
+        return left > right
+    if op == '>=':
+        return left >= right
+    if op == 'in':
+        return left in right
+    return left not in right
+
+def partition_matches(values, filters):
+    for column, op, value in filters:
+        if column not in values:
+            continue
+        like = next(iter(value), None) if op in ('in', 'not in') else value
+        try:
+            if not _compare(_coerce(values[column], like), op, value):
+                return False
+        except TypeError:
+            # 类型无法比较时不剪枝，交给读取后的行级过滤
+            continue
+    return True
+
+def filter_rows(df, filters):
+    mask = pd.Series(True, index=df.index)
+    for column, op, value in filters:
+        if column not in df.columns:
+            continue
+        series = df[column]
+        like = next(iter(value), None) if op in ('in', 'not in') else value
+        if isinstance(like, (int, float)) and not isinstance(like, bool):
+            series = pd.to_numeric(series, errors='coerce')
+        elif isinstance(like, str):
+            # 可空字符串类型比较时缺失值得到 NA，而不是与 float 比较报错
+            series = series.astype('string')
+        if op == 'in':
+            mask &= series.isin(list(value))
+        elif op == 'not in':
+            mask &= ~series.isin(list(value))
+        else:
+            mask &= _compare(series, op, value).fillna(False).astype(bool)
+    return df[mask.to_numpy()]
+
+def _read_columns(path, wanted, sheet_workers=None):
+    if path.endswith('.parquet'):
+        if not PARQUET_AVAILABLE:
+            raise ImportError("读取 Parquet 分区需要 pyarrow")
+        if wanted is None:
+            return pd.read_parquet(path)
+        # Parquet 按列存储，只解码需要的列
+        available = set(pq.read_schema(path).names)
+        return pd.read_parquet(path, columns=[col for col in wanted if col in available])
+    if path.endswith('.xlsx'):
+        sheet_name = None if SETTINGS['data_processing']['excel_all_sheets'] else 0
+        return read_excel_fast(path, sheet_name=sheet_name, usecols=wanted, max_workers=sheet_workers)
+    return pd.read_csv(path, usecols=None if wanted is None else (lambda col: col in wanted))
+
+def _read_cached(path, cache_dir, clean, sheet_workers=None):
+    # 非 Parquet 分区解析一次后以压缩后的列式格式缓存，按文件内容命中，之后只读取缓存
+    cache = DatasetCache(cache_dir=cache_dir)
+    with open(path, 'rb') as file:
+        key = cache.make_key(file.read(), 'partition', clean, SETTINGS['data_processing']['excel_all_sheets'])
+
+    def load():
+        df = _read_columns(path, None, sheet_workers)
+        processor = DataProcessor()
+        if clean:
+            df = processor.clean_numeric_columns(df)
+        if SETTINGS['data_processing']['compact_dtypes']:
+            df, _ = processor.compact_dtypes(df)
+        return df
+
+    return cache.get_or_load(key, load)
+
+def read_partition(path, values, columns=None, filters=None, clean=True, cache_dir=None, sheet_workers=None):
+    filters = filters or []
+    # 行级过滤用到的列即使不在投影中也要读入，过滤后再丢弃
+    wanted = None if columns is None else set(columns) | {column for column, _, _ in filters}
+    if cache_dir is not None and not path.endswith('.parquet'):
+        df = _read_cached(path, cache_dir, clean, sheet_workers)
+        if wanted is not None:
+            df = df[[col for col in df.columns if col in wanted]]
+    else:
+        df = _read_columns(path, wanted, sheet_workers)
+        if clean:
+            df = DataProcessor().clean_numeric_columns(df)
+    for key, value in values.items():
+        if key not in df.columns and (columns is None or key in columns):
+            df[key] = value
+    if filters:
+        df = filter_rows(df, filters).reset_index(drop=True)
+    if columns is not None:
+        df = df[[col for col in columns if col in df.columns]]
+    return df
+
+class PartitionedDataset:
+    def __init__(self, root, pattern=None, max_workers=None, cache_dir=None):
+        # 分区键来自 Hive 风格的路径段（月份=2024-01/...），或 pattern 中的命名分组（如 (?P<月份>\d{4}-\d{2})）
+        self.root = root
+        self.pattern = re.compile(pattern) if pattern else None
+        self.max_workers = max_workers
+        self.cache_dir = cache_dir
+        self.partitions = self._discover()
+        self.last_read = None
+
+    def _discover(self):
+        if os.path.isfile(self.root):
+            return [(self.root, self._partition_values(os.path.basename(self.root)))]
+        partitions = []
+        for directory, subdirs, files in os.walk(self.root):
+            subdirs.sort()
+            for name in sorted(files):
+                if name.endswith(PARTITION_EXTENSIONS) and not name.startswith(('.', '~$')):
+                    path = os.path.join(directory, name)
+                    partitions.append((path, self._partition_values(os.path.relpath(path, self.root))))
+        return partitions
+
+    def _partition_values(self, relative_path):
+        values = {}
+        for segment in relative_path.replace('\\', '/').split('/'):
+            stem = os.path.splitext(segment)[0] if segment.endswith(PARTITION_EXTENSIONS) else segment
+            if '=' in stem:
+                key, value = stem.split('=', 1)
+                values[key] = value
+        if self.pattern is not None:
+            match = self.pattern.search(relative_path.replace('\\', '/'))
+            if match:
+                values.update({key: value for key, value in match.groupdict().items() if value is not None})
+        return values
+
+    @property
+    def partition_keys(self):
+        return list(dict.fromkeys(key for _, values in self.partitions for key in values))
+
+    def select(self, filters=None):
+        filters = filters or []
+        for _, op, _ in filters:
+            if op not in FILTER_OPERATORS:
+                raise ValueError(f"不支持的过滤运算符: {op}，可选 {FILTER_OPERATORS}")
+        return [(path, values) for path, values in self.partitions if partition_matches(values, filters)]
+
+    def read(self, columns=None, filters=None, clean=True, max_workers=None):
+        start = time.perf_counter()
+        filters = list(filters or [])
+        selected = self.select(filters)
+        # 只作用于分区键的条件在剪枝时已经满足，不再逐行判断
+        partition_keys = set(self.partition_keys)
+        row_filters = [item for item in filters if item[0] not in partition_keys]
+
+        max_workers = max_workers or self.max_workers or SETTINGS['data_processing']['partition_workers'] or os.cpu_count() or 1
+        paths = [path for path, _ in selected]
+        values = [partition_values for _, partition_values in selected]
+        if max_workers == 1 or len(selected) <= 1:
+            # 只有一个分区时把并行度留给工作簿内的多个工作表
+            chunks = [
+                read_partition(path, value, columns, row_filters, clean, self.cache_dir, max_workers)
+                for path, value in selected
+            ]
+        else:
+            with process_pool(min(max_workers, len(selected))) as executor:
+                chunks = list(executor.map(
+                    read_partition, paths, values, repeat(columns), repeat(row_filters), repeat(clean),
+                    repeat(self.cache_dir), repeat(1)
+                ))
+
+        chunks = [chunk for chunk in chunks if len(chunk.columns)]
+        data = concat_chunks(chunks) if chunks else pd.DataFrame(columns=columns or [])
+        self.last_read = {
+            'partitions': len(self.partitions),
+            'read': len(selected),
+            'pruned': len(self.partitions) - len(selected),
+            'columns': list(data.columns),
+            'rows': len(data),
+            'seconds': time.perf_counter() - start
+        }
+        return data
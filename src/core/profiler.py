@@ -0,0 +1,103 @@
+import pandas as pd
+import numpy as np
+from config.constants import CONSTANTS
+from config.settings import SETTINGS
+
+HASH_SPACE = float(2 ** 64)
+
+def approx_distinct_count(hashes, sketch_size=4096):
+    # KMV 草图：取最小的 k 个不同哈希值，由第 k 小值在哈希空间中的位置估计基数
+    total = len(hashes)
+    if total > sketch_size:
+        cutoff = np.uint64(min(int(4.0 * sketch_size / total * HASH_SPACE), 2 ** 64 - 1))
+        smallest = np.unique(hashes[hashes <= cutoff])
+        if len(smallest) >= sketch_size:
+            kth = float(smallest[sketch_size - 1]) + 1.0
+            return int(round((sketch_size - 1) / (kth / HASH_SPACE))), True
+    # 基数相对行数较小时，精确哈希表本身就很便宜
+    return len(pd.unique(hashes)), False
+
+def _is_numeric(dtype):
+    return pd.api.types.is_numeric_dtype(dtype) and not pd.api.types.is_bool_dtype(dtype)
+
+class DataProfile:
+    def __init__(self, row_count, table):
+        self.row_count = row_count
+        self.table = table
+
+    def column_types(self):
+        column_types = {'numeric': [], 'ordinal': [], 'nominal': [], 'identifier': []}
+        for col, type_hint in self.table['type_hint'].items():
+            column_types[type_hint].append(col)
+        return column_types
+
+def _column_profile(series, approx_threshold, sketch_size):
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        codes = series.cat.codes.to_numpy()
+        missing = np.count_nonzero(codes < 0)
+        used = np.bincount(codes[codes >= 0], minlength=len(series.cat.categories)) > 0
+        sample = series.cat.categories[used][:5].tolist()
+        return {'missing': missing, 'distinct': int(used.sum()), 'approximate': False, 'sample_values': sample}
+
+    values = series.to_numpy()
+    mask = pd.isna(values)
+    missing = int(np.count_nonzero(mask))
+    valid = values[~mask] if missing else values
+    profile = {'missing': missing}
+
+    # 字符串对象自带缓存的 hash，精确哈希表已经很快；数值列在大数据量下改用草图
+    if len(valid) > approx_threshold and _is_numeric(series.dtype):
+        hashes = pd.util.hash_array(valid, categorize=False)
+        profile['distinct'], profile['approximate'] = approx_distinct_count(hashes, sketch_size)
+        uniques = None
+    else:
+        uniques = pd.unique(valid)
+        profile['distinct'], profile['approximate'] = len(uniques), False
+
+    if _is_numeric(series.dtype):
+        if len(valid):
+            as_float = valid.astype(np.float64, copy=False)
+            profile.update({
+                'mean': as_float.mean(),
+                'std': as_float.std(ddof=1) if len(valid) > 1 else np.nan,
+                'min': valid.min(),
+                'max': valid.max()
+            })
+        else:
+            profile.update({'mean': np.nan, 'std': np.nan, 'min': np.nan, 'max': np.nan})
+
+    sample = pd.unique(valid[:10000])[:5] if uniques is None else uniques[:5]
+    if len(sample) < 5 and uniques is None:
+        sample = pd.unique(valid)[:5]
+    profile['sample_values'] = sample.tolist()
+    return profile
+
+def profile_dataframe(df, approx_threshold=None, sketch_size=None):
+    settings = SETTINGS['data_processing']
+    approx_threshold = settings['approx_distinct_rows'] if approx_threshold is None else approx_threshold
+    sketch_size = settings['distinct_sketch_size'] if sketch_size is None else sketch_size
+    row_count = len(df)
+
+    id_keywords = CONSTANTS['ID_KEYWORDS']
+    ordinal_keywords = CONSTANTS['ORDINAL_KEYWORDS']
+    records = {}
+    for col in df.columns:
+        series = df[col]
+        profile = _column_profile(series, approx_threshold, sketch_size)
+        profile['dtype'] = series.dtype
+        profile['non_null'] = row_count - profile['missing']
+
+        if any(keyword in str(col).lower() for keyword in id_keywords) or (
+            row_count and profile['distinct'] / row_count > 0.8
+        ):
+            profile['type_hint'] = 'identifier'
+        elif _is_numeric(series.dtype):
+            profile['type_hint'] = 'numeric'
+        elif any(keyword in str(col) for keyword in ordinal_keywords):
+            profile['type_hint'] = 'ordinal'
+        else:
+            profile['type_hint'] = 'nominal'
+        records[col] = profile
+
+    table = pd.DataFrame.from_dict(records, orient='index')
+    return DataProfile(row_count, table)
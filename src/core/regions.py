@@ -0,0 +1,54 @@
+import pandas as pd
+import numpy as np
+from config.constants import CONSTANTS
+
+REGION_COLUMNS = ['省份', '城市', '大区', '城市等级']
+
+# 导入时一次性构建查找索引
+PROVINCE_TO_REGION = {
+    province: region
+    for region, provinces in CONSTANTS['REGIONS'].items()
+    for province in provinces
+}
+CITY_TO_TIER = {
+    city: tier
+    for tier, cities in CONSTANTS['CITY_TIERS'].items()
+    for city in cities
+}
+REGION_NAMES = set(CONSTANTS['REGIONS'])
+
+def parse_region_values(values):
+    # 只处理去重后的取值，形如“华东-上海”，前段为大区、后段为省份/城市
+    text = pd.Series(values, dtype=object).astype(str).str.strip()
+    parts = text.str.split('-', n=2)
+    has_prefix = text.str.contains('-', regex=False)
+    prefix = parts.str[0].where(has_prefix)
+    place = parts.str[1].where(has_prefix, text)
+
+    region = prefix.where(prefix.isin(REGION_NAMES))
+    region = region.fillna(place.map(PROVINCE_TO_REGION))
+    return pd.DataFrame({
+        '省份': place,
+        '城市': place,
+        '大区': region.fillna('未知'),
+        '城市等级': place.map(CITY_TO_TIER).fillna('其他')
+    })
+
+def _categorical_take(values, codes):
+    categories_codes, categories = pd.factorize(values)
+    taken = np.where(codes >= 0, categories_codes[codes], -1)
+    return pd.Categorical.from_codes(taken, categories=categories)
+
+def enrich_regions(df, column='区域', overwrite=False, copy=True):
+    if column not in df.columns:
+        return df
+    targets = [col for col in REGION_COLUMNS if overwrite or col not in df.columns]
+    if not targets:
+        return df
+
+    codes, uniques = pd.factorize(df[column])
+    parsed = parse_region_values(uniques)
+    df_enriched = df.copy() if copy else df
+    for col in targets:
+        df_enriched[col] = pd.Series(_categorical_take(parsed[col].to_numpy(), codes), index=df.index)
+    return df_enriched
@@ -0,0 +1,95 @@
+import pandas as pd
+import numpy as np
+from src.core.cube import CUBE_MEASURES, COUNT_COLUMN
+
+GRANULARITIES = ['日', '周', '月']
+
+def parse_dates(values):
+    # 日期列通常只有几百个不同值：先去重，只转换去重后的值再按编码取回
+    if pd.api.types.is_datetime64_any_dtype(values):
+        return pd.DatetimeIndex(values).to_numpy(dtype='datetime64[D]')
+    codes, uniques = pd.factorize(values)
+    parsed = pd.to_datetime(pd.Series(uniques), errors='coerce').to_numpy(dtype='datetime64[D]')
+    return np.append(parsed, np.datetime64('NaT', 'D'))[codes]
+
+def period_keys(days, granularity):
+    if granularity == '日':
+        return days
+    if np.issubdtype(days.dtype, np.datetime64):
+        days = days.astype('datetime64[D]')
+        if granularity == '月':
+            return days.astype('datetime64[M]').astype('datetime64[D]')
+        # 1970-01-01 是周四，+3 后对 7 取余即为距本周一的天数
+        day_numbers = days.astype(np.int64)
+        return (day_numbers - (day_numbers + 3) % 7).astype('datetime64[D]')
+    if granularity == '周':
+        return (days - 1) // 7 + 1
+    raise ValueError("整数日期序号没有月份信息，只支持按日、按周汇总")
+
+class TrendRollups:
+    def __init__(self, date_column='日期', measures=None):
+        self.date_column = date_column
+        self.measures = list(measures or CUBE_MEASURES)
+        self.tables = {}
+        self.row_count = 0
+        self.updated_periods = {}
+
+    @classmethod
+    def build(cls, df, date_column='日期', measures=None):
+        rollups = cls(date_column, [col for col in (measures or CUBE_MEASURES) if col in df.columns])
+        rollups.append(df)
+        return rollups
+
+    def granularities(self):
+        return list(self.tables)
+
+    def _day_keys(self, values):
+        if pd.api.types.is_numeric_dtype(values):
+            # 整数日期（1..30）按日序号汇总，不误转为纪元时间
+            days = pd.to_numeric(values, errors='coerce').to_numpy(dtype=np.float64)
+            valid = ~np.isnan(days)
+            return days[valid].astype(np.int64), valid
+        days = parse_dates(values)
+        valid = ~np.isnat(days)
+        return days[valid], valid
+
+    def _daily_delta(self, df):
+        days, valid = self._day_keys(df[self.date_column])
+        codes, uniques = pd.factorize(days, sort=True)
+        # 传入的是上卷后的表时按其订单数计数，否则每行计为一单
+        counts = df[COUNT_COLUMN].to_numpy(dtype=np.float64)[valid] if COUNT_COLUMN in df.columns else None
+        delta = {}
+        for col in self.measures:
+            values = np.nan_to_num(pd.to_numeric(df[col], errors='coerce').to_numpy(dtype=np.float64)[valid])
+            delta[col] = np.bincount(codes, weights=values, minlength=len(uniques))
+        delta[COUNT_COLUMN] = np.bincount(codes, weights=counts, minlength=len(uniques)).astype(np.int64)
+        return pd.DataFrame(delta, index=pd.Index(uniques, name=self.date_column))
+
+    def append(self, df):
+        daily = self._daily_delta(df)
+        is_datetime = np.issubdtype(daily.index.dtype, np.datetime64)
+        granularities = GRANULARITIES if is_datetime else ['日', '周']
+
+        for granularity in granularities:
+            keys = period_keys(daily.index.to_numpy(), granularity)
+            delta = daily.groupby(keys).sum().rename_axis(self.date_column)
+            table = self.tables.get(granularity)
+            if table is None:
+                self.tables[granularity] = delta
+            else:
+                # 汇总量可加：只在受影响的周期行上累加，新出现的周期追加后重新排序
+                existing = delta.index.isin(table.index)
+                if existing.any():
+                    table.loc[delta.index[existing]] += delta[existing].to_numpy()
+                if not existing.all():
+                    table = pd.concat([table, delta[~existing]]).sort_index()
+                self.tables[granularity] = table
+            self.updated_periods[granularity] = len(delta)
+
+        self.row_count += int(daily[COUNT_COLUMN].sum())
+        return self
+
+    def table(self, granularity='日'):
+        if granularity not in self.tables:
+            raise ValueError(f"不支持的汇总粒度: {granularity}，可选 {self.granularities()}")
+        return self.tables[granularity].reset_index()
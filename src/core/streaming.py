@@ -0,0 +1,236 @@
+import pandas as pd
+import numpy as np
+from concurrent.futures import FIRST_COMPLETED, wait
+from pandas.api.types import union_categoricals
+from src.core.data_processor import DataProcessor
+from src.utils.data_utils import iter_csv_chunks
+from src.utils.job_scheduler import process_pool
+
+def concat_chunks(chunks):
+    if len(chunks) == 1:
+        return chunks[0]
+    data = pd.concat(chunks, ignore_index=True)
+    # 各批次的类别集合不同，直接拼接会退化为 object，按类别并集重新合成
+    for col in chunks[0].columns:
+        if isinstance(chunks[0][col].dtype, pd.CategoricalDtype) and col in data.columns:
+            data[col] = union_categoricals([chunk[col].astype('category') for chunk in chunks], ignore_order=True)
+    return data
+
+class CorrelationAccumulator:
+    # 按列对保存成对有效样本数、均值、二阶矩与协矩，与 DataFrame.corr() 的成对剔除缺失值语义一致
+    def __init__(self, columns=None):
+        self.columns = list(columns) if columns is not None else None
+        self.count = None
+        self.mean = None
+        self.m2 = None
+        self.comoment = None
+
+    def _init_state(self, columns):
+        self.columns = list(columns)
+        size = len(self.columns)
+        self.count = np.zeros((size, size))
+        self.mean = np.zeros((size, size))
+        self.m2 = np.zeros((size, size))
+        self.comoment = np.zeros((size, size))
+
+    def _combine(self, count, mean, m2, comoment):
+        # Chan 等人的并行合并公式，[i, j] 位置的矩只统计 i、j 同时非空的行
+        total = self.count + count
+        with np.errstate(divide='ignore', invalid='ignore'):
+            weight = np.where(total > 0, count / total, 0.0)
+            cross = np.where(total > 0, self.count * count / total, 0.0)
+        delta = mean - self.mean
+        self.mean = self.mean + delta * weight
+        self.m2 = self.m2 + m2 + delta ** 2 * cross
+        self.comoment = self.comoment + comoment + delta * delta.T * cross
+        self.count = total
+
+    def update(self, chunk):
+        if self.columns is None:
+            self._init_state(chunk.select_dtypes(include=[np.number]).columns)
+        elif self.count is None:
+            self._init_state(self.columns)
+        if not len(chunk) or not self.columns:
+            return self
+
+        values = chunk.reindex(columns=self.columns).to_numpy(dtype=np.float64)
+        valid = ~np.isnan(values)
+        # 先按块内均值平移再求和，避免大数值的原始矩相减带来的精度损失
+        filled = np.where(valid, values, 0.0)
+        shift = filled.sum(axis=0) / np.maximum(valid.sum(axis=0), 1)
+        centered = np.where(valid, filled - shift, 0.0)
+        mask = valid.astype(np.float64)
+
+        count = mask.T @ mask
+        sums = centered.T @ mask
+        squares = (centered ** 2).T @ mask
+        products = centered.T @ centered
+        with np.errstate(divide='ignore', invalid='ignore'):
+            local_mean = np.where(count > 0, sums / count, 0.0)
+            m2 = np.where(count > 0, squares - sums * local_mean, 0.0)
+            comoment = np.where(count > 0, products - sums * local_mean.T, 0.0)
+        self._combine(count, local_mean + shift[:, None], m2, comoment)
+        return self
+
+    def merge(self, other):
+        if other.count is None:
+            return self
+        if self.count is None:
+            self._init_state(other.columns)
+        if self.columns != other.columns:
+            raise ValueError("合并的相关性累加器字段不一致")
+        self._combine(other.count, other.mean, other.m2, other.comoment)
+        return self
+
+    def covariance(self):
+        if self.count is None:
+            return None
+        with np.errstate(divide='ignore', invalid='ignore'):
+            cov = np.where(self.count > 1, self.comoment / (self.count - 1), np.nan)
+        return pd.DataFrame(cov, index=self.columns, columns=self.columns)
+
+    def correlation(self):
+        if self.count is None:
+            return None
+        with np.errstate(divide='ignore', invalid='ignore'):
+            corr = self.comoment / np.sqrt(self.m2 * self.m2.T)
+        corr = np.where((self.count > 1) & np.isfinite(corr), np.clip(corr, -1, 1), np.nan)
+        return pd.DataFrame(corr, index=self.columns, columns=self.columns)
+
+    def save(self, path):
+        np.savez(
+            path,
+            columns=np.array(self.columns or [], dtype=object),
+            count=self.count, mean=self.mean, m2=self.m2, comoment=self.comoment
+        )
+        return path
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path, allow_pickle=True) as state:
+            accumulator = cls(state['columns'].tolist())
+            if state['count'].ndim == 2:
+                accumulator.count = state['count']
+                accumulator.mean = state['mean']
+                accumulator.m2 = state['m2']
+                accumulator.comoment = state['comoment']
+        return accumulator
+
+def _accumulate_chunk(chunk, columns):
+    return CorrelationAccumulator(columns).update(chunk)
+
+def accumulate_correlations(chunks, columns=None, max_workers=1):
+    accumulator = CorrelationAccumulator(columns)
+    if max_workers == 1:
+        for chunk in chunks:
+            accumulator.update(chunk)
+        return accumulator
+
+    chunks = iter(chunks)
+    if columns is None:
+        first = next(chunks, None)
+        if first is None:
+            return accumulator
+        accumulator.update(first)
+        columns = accumulator.columns
+    # executor.map 会一次性提交生成器中的全部数据块，整份文件以待处理任务的形式驻留内存；
+    # 这里最多保留 2 × max_workers 个未完成的数据块，完成一个合并一个再读入下一块
+    with process_pool(max_workers) as executor:
+        pending = set()
+        for chunk in chunks:
+            if len(pending) >= 2 * max_workers:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    accumulator.merge(future.result())
+            pending.add(executor.submit(_accumulate_chunk, chunk, columns))
+        for future in pending:
+            accumulator.merge(future.result())
+    return accumulator
+
+class ChunkAggregator:
+    def __init__(self, group_keys=None, value_columns=None, track_correlations=False):
+        self.group_keys = [[key] if isinstance(key, str) else list(key) for key in (group_keys or [])]
+        self.value_columns = value_columns or ['销售额', '利润', '销售数']
+        self.row_count = 0
+        self.chunk_count = 0
+        self.null_counts = None
+        self.dtypes = None
+        self.group_totals = {}
+        self.correlations = CorrelationAccumulator() if track_correlations else None
+
+    def update(self, chunk):
+        self.row_count += len(chunk)
+        self.chunk_count += 1
+
+        chunk_nulls = chunk.isnull().sum()
+        if self.null_counts is None:
+            self.null_counts = chunk_nulls
+            self.dtypes = dict(chunk.dtypes)
+        else:
+            self.null_counts = self.null_counts.add(chunk_nulls, fill_value=0).astype('int64')
+            for col, dtype in chunk.dtypes.items():
+                current = self.dtypes.get(col)
+                if current is None:
+                    self.dtypes[col] = dtype
+                elif current != dtype:
+                    both_numeric = pd.api.types.is_numeric_dtype(current) and pd.api.types.is_numeric_dtype(dtype)
+                    self.dtypes[col] = np.result_type(current, dtype) if both_numeric else np.dtype(object)
+
+        for keys in self.group_keys:
+            if not all(key in chunk.columns for key in keys):
+                continue
+            values = [col for col in self.value_columns if col in chunk.columns]
+            if not values:
+                continue
+            partial = chunk.groupby(keys, observed=True, sort=False)[values].sum()
+            name = tuple(keys)
+            if name in self.group_totals:
+                self.group_totals[name] = self.group_totals[name].add(partial, fill_value=0)
+            else:
+                self.group_totals[name] = partial
+
+        if self.correlations is not None:
+            self.correlations.update(chunk)
+        return self
+
+    def get_group_totals(self, keys):
+        name = (keys,) if isinstance(keys, str) else tuple(keys)
+        totals = self.group_totals.get(name)
+        if totals is None:
+            return None
+        return totals.sort_index().reset_index()
+
+    def missing_value_report(self):
+        if self.null_counts is None:
+            return None
+        columns = list(self.dtypes)
+        missing = self.null_counts.reindex(columns).fillna(0).astype('int64')
+        missing_stats = pd.DataFrame({
+            '字段名': columns,
+            '数据类型': list(self.dtypes.values()),
+            '总行数': self.row_count,
+            '非空值数量': self.row_count - missing,
+            '缺失值数量': missing,
+            '缺失比例%': (missing / max(self.row_count, 1) * 100).round(2)
+        }, index=columns)
+        return missing_stats
+
+def stream_csv(source, chunksize=100000, group_keys=None, value_columns=None, processor=None, keep_chunks=False,
+               track_correlations=False, compact=False):
+    # 不保留数据块时只有聚合结果驻留内存，峰值与文件大小无关；keep_chunks=True 时保留全部（可选压缩后的）数据块，
+    # 峰值约为压缩后数据的两倍（拼接时复制一次），仍随行数线性增长，省去的只是整表原始字符串与清洗中间结果
+    processor = processor or DataProcessor()
+    aggregator = ChunkAggregator(group_keys=group_keys, value_columns=value_columns,
+                                 track_correlations=track_correlations)
+    kept = []
+
+    for chunk in processor.clean_numeric_chunks(iter_csv_chunks(source, chunksize=chunksize)):
+        aggregator.update(chunk)
+        if keep_chunks:
+            # 保留前逐块压缩，驻留内存只是压缩后的大小，而不是整份清洗后数据
+            kept.append(processor.compact_dtypes(chunk)[0] if compact else chunk)
+
+    if keep_chunks:
+        data = concat_chunks(kept) if kept else pd.DataFrame()
+        return aggregator, data
+    return aggregator
@@ -1,24 +1,36 @@
+import numpy as np
 import matplotlib.pyplot as plt
 import seaborn as sns
-import plotly.express as px
-import plotly.graph_objects as go
 
 class Visualizer:
     def __init__(self):
         plt.rcParams['font.sans-serif'] = ['SimHei', 'Microsoft YaHei']
         plt.rcParams['axes.unicode_minus'] = False
     
-    def create_correlation_heatmap(self, correlation_matrix, figsize=(10, 8)):
+    def create_correlation_heatmap(self, correlation_matrix, figsize=(10, 8), threshold=None, max_annot=20):
+        if threshold is not None:
+            # 只保留至少与一个其他字段强相关的行列
+            strength = correlation_matrix.abs().to_numpy(copy=True)
+            np.fill_diagonal(strength, 0)
+            keep = np.nan_to_num(strength).max(axis=0) >= threshold
+            correlation_matrix = correlation_matrix.loc[keep, keep]
         fig, ax = plt.subplots(figsize=figsize)
-        sns.heatmap(correlation_matrix, annot=True, cmap='coolwarm', center=0, ax=ax)
+        sns.heatmap(correlation_matrix, annot=len(correlation_matrix) <= max_annot, cmap='coolwarm', center=0, ax=ax)
         ax.set_title('变量相关性热力图')
         return fig
     
-    def create_sales_trend_chart(self, sales_data, date_column='日期'):
-        fig = px.line(sales_data, x=date_column, y='销售额', title='销售额趋势图')
+    def create_sales_trend_chart(self, sales_data, date_column='日期', granularity='日', value='销售额'):
+        # 传入 TrendRollups 时直接读取对应粒度的汇总表，不再扫描订单明细
+        if hasattr(sales_data, 'table'):
+            date_column = sales_data.date_column
+            sales_data = sales_data.table(granularity)
+        # plotly 只在生成交互图时导入，命令行批处理不加载
+        import plotly.express as px
+        fig = px.line(sales_data, x=date_column, y=value, title=f'{value}趋势图（按{granularity}）')
         return fig
     
     def create_cluster_scatter(self, df, x_col, y_col, cluster_col='cluster'):
+        import plotly.express as px
         fig = px.scatter(df, x=x_col, y=y_col, color=cluster_col, 
                         title=f'{x_col} vs {y_col} - 聚类分布')
         return fig
@@ -26,5 +38,6 @@ class Visualizer:
     def create_bar_chart(self, df, x_col, y_col, title=None):
         if title is None:
             title = f'{y_col} by {x_col}'
+        import plotly.express as px
         fig = px.bar(df, x=x_col, y=y_col, title=title)
         return fig
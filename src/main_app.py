@@ -5,6 +5,8 @@ import os
 # 添加当前目录到Python路径
 current_dir = os.path.dirname(os.path.abspath(__file__))
 sys.path.insert(0, current_dir)
+# 项目根目录，用于导入 config
+sys.path.insert(1, os.path.dirname(current_dir))
 
 # 导入标准库
 import pandas as pd
@@ -15,11 +17,19 @@ warnings.filterwarnings('ignore')
 try:
     # 修正导入路径 - 匹配你的实际文件结构
     from core.data_processor import DataProcessor  # 注意是 data_processor 不是 data.processor
+    from core.streaming import stream_csv
+    from core.cube import AggregateCube
+    from core.features import DailyFeatureStore
+    from core.incremental import IncrementalDataset
     from tasks.task1_preprocessing import Task1Preprocessor
     from tasks.task2_multidimensional import Task2Analyzer
     from tasks.task3_forecasting import Task3Forecaster
     from tasks.task4_optimization import Task4Optimizer
     from utils.config_utils import load_config  # 注意是 config_utils 不是 config.utils
+    from utils.data_utils import read_excel_fast
+    from utils.job_scheduler import JobScheduler, FINISHED, FAILED
+    from utils.cache_utils import DatasetCache, ResultCache, ModelStore, dataset_fingerprint, hash_bytes
+    from config.settings import SETTINGS
     st.success("✅ 所有模块导入成功！")
 except ImportError as e:
     st.error(f"❌ 模块导入失败: {e}")
@@ -35,6 +45,87 @@ except ImportError as e:
     if os.path.exists('./utils'):
         st.write("utils目录内容:", os.listdir('./utils'))
 
+@st.cache_resource
+def get_dataset_cache():
+    # 进程级单例，命中/未命中计数在多次 rerun 之间保留
+    return DatasetCache()
+
+@st.cache_resource
+def get_result_cache():
+    return ResultCache()
+
+@st.cache_resource
+def get_model_store():
+    # 已拟合的标准化器、编码器与预测模型落盘保存，重启后同一数据与参数无需重新拟合
+    return ModelStore()
+
+def get_feature_store():
+    # 每个会话保留一份每日特征，新增日期的数据上传后只计算新增的行
+    if st.session_state.get('feature_store') is None:
+        st.session_state.feature_store = DailyFeatureStore()
+    return st.session_state.feature_store
+
+def get_incremental_dataset(cache_key):
+    # 以当前清洗后的数据为历史只累计一次统计量，之后每次追加只处理新批次
+    entry = st.session_state.incremental_dataset
+    if entry is None or entry[0] != cache_key:
+        dataset = IncrementalDataset.from_frame(st.session_state.raw_data, fingerprint=st.session_state.data_fingerprint)
+        st.session_state.incremental_dataset = (cache_key, dataset)
+    return st.session_state.incremental_dataset[1]
+
+@st.cache_resource
+def get_job_scheduler():
+    # 进程级调度器：任务在后台线程中运行，页面重跑或切换页面后仍可取回进度与结果
+    return JobScheduler()
+
+def cube_loader():
+    # 在主线程取出会话数据与缓存对象，后台线程只使用这些局部引用，不访问 st.session_state
+    data, cache = st.session_state.raw_data, get_result_cache()
+    key = ResultCache.make_key('cube', st.session_state.data_fingerprint)
+    return lambda: cache.get_or_compute(key, lambda: AggregateCube.build(data))
+
+def show_job_status(job):
+    def render():
+        snapshot = job.snapshot()
+        stage = f" · {snapshot['stage']}" if snapshot['stage'] else ""
+        st.progress(snapshot['progress'], text=f"{snapshot['status']}{stage} · {snapshot['elapsed_seconds']:.1f} 秒")
+        if snapshot['stages']:
+            st.dataframe(pd.DataFrame(snapshot['stages'], columns=['阶段', '耗时(秒)']), hide_index=True)
+        if snapshot['error']:
+            st.error(f"后台任务失败: {snapshot['error']}")
+        # 任务刚结束时整页重跑一次，以显示结果
+        if job.done and job.job_id not in st.session_state.seen_jobs:
+            st.session_state.seen_jobs.add(job.job_id)
+            st.rerun()
+
+    if job.done or not hasattr(st, 'fragment'):
+        render()
+        if not job.done:
+            st.button("刷新进度", key=f"refresh_{job.job_id}")
+    else:
+        # 运行期间只局部刷新进度区域，不阻塞页面其他部分
+        st.fragment(run_every=1)(render)()
+
+def run_memoized(task_name, settings_section, button_label, spinner_text, compute):
+    # 数据指纹与相关配置都未变化时直接返回缓存结果；否则提交到后台任务，完成后写入结果缓存
+    cache = get_result_cache()
+    key = ResultCache.make_key(task_name, st.session_state.data_fingerprint, settings_section)
+    results = cache.get(key)
+    if results is not None:
+        st.caption("⚡ 数据与参数未变化，显示缓存结果")
+        return results
+
+    scheduler = get_job_scheduler()
+    job = scheduler.find(key)
+    if (job is None or job.status == FAILED) and st.button(button_label, type="primary"):
+        job = scheduler.submit(spinner_text, compute, key=key, on_done=lambda value: cache.put(key, value))
+        st.session_state.seen_jobs.discard(job.job_id)
+    if job is not None:
+        show_job_status(job)
+        if job.status == FINISHED:
+            return job.result
+    return None
+
 def initialize_session_state():
     default_states = {
         'raw_data': None,
@@ -51,6 +142,10 @@ def initialize_session_state():
         'processed_data': None,
         'category_encoder': None,
         'current_file': None,
+        'data_cache_key': None,
+        'data_fingerprint': None,
+        'incremental_dataset': None,
+        'seen_jobs': set(),
         'task1_completed': False,
         'task2_completed': False,
         'task3_completed': False,
@@ -140,14 +235,47 @@ def show_task1_preprocessing():
     
     uploaded_file = st.file_uploader("上传原始数据表（支持Excel或CSV格式）", type=["xlsx", "csv"])
 
+    streaming = False
+    if uploaded_file is not None and uploaded_file.name.endswith('.csv'):
+        streaming = st.checkbox("流式分块读取（适用于大文件）", value=False)
+        if streaming:
+            # 分析页面需要整份数据驻留内存：流式读取省去的是整表原始字符串与清洗中间结果，
+            # 驻留内存降为压缩后的数据大小，但仍随文件行数线性增长
+            st.caption("逐块清洗并压缩后保留，避免整表原始字符串驻留内存；分析仍需载入全部数据，内存随行数增长")
+            chunk_size = st.number_input("每块行数", min_value=1000, value=SETTINGS['data_processing']['chunk_size'], step=10000)
+    all_sheets = False
+    if uploaded_file is not None and uploaded_file.name.endswith('.xlsx'):
+        all_sheets = st.checkbox("合并全部工作表（多个工作表并行解析）", value=SETTINGS['data_processing']['excel_all_sheets'])
+
     if uploaded_file is not None:
         try:
             processor = DataProcessor()
+            cache = get_dataset_cache()
+            # 清洗、压缩后的结果以 Parquet 缓存，同一工作簿不会被解析第二次；读取范围不同则分别缓存
+            cache_key = cache.make_key(uploaded_file, *(['全部工作表'] if all_sheets else []))
+            df = None
+            df_clean = cache.get(cache_key)
             
             # 改进的文件读取逻辑
-            if uploaded_file.name.endswith('.xlsx'):
+            if df_clean is not None:
+                st.info("⚡ 命中数据缓存，跳过文件解析与清洗")
+            elif streaming:
+                # 逐块清洗，原始字符串数据不会整体驻留内存
+                aggregator, df_clean = stream_csv(
+                    uploaded_file,
+                    chunksize=int(chunk_size),
+                    group_keys=['商品品类', '日期'],
+                    processor=processor,
+                    keep_chunks=True,
+                    compact=SETTINGS['data_processing']['compact_dtypes']
+                )
+                df = df_clean
+                st.caption(f"共读取 {aggregator.chunk_count} 个数据块")
+                with st.expander("流式缺失值统计"):
+                    st.dataframe(aggregator.missing_value_report())
+            elif uploaded_file.name.endswith('.xlsx'):
                 try:
-                    df = pd.read_excel(uploaded_file, engine='openpyxl')
+                    df = read_excel_fast(uploaded_file.getvalue(), sheet_name=None if all_sheets else 0)
                 except ImportError:
                     st.error("❌ 缺少 openpyxl 库，无法读取 Excel 文件")
                     st.info("请在 requirements.txt 中添加 'openpyxl>=3.1.0'")
@@ -155,23 +283,42 @@ def show_task1_preprocessing():
             else:
                 df = pd.read_csv(uploaded_file)
 
-            df_clean = processor.clean_numeric_columns(df)
+            if df_clean is None:
+                df_clean = processor.clean_numeric_columns(df)
+            if df is not None:
+                df_clean = processor.enrich_regions(df_clean)
+                if SETTINGS['data_processing']['compact_dtypes']:
+                    df_clean, memory_report = processor.compact_dtypes(df_clean)
+                    with st.expander("内存压缩报告"):
+                        st.dataframe(memory_report)
+                cache.put(cache_key, df_clean)
+            dataset_entry = st.session_state.incremental_dataset
+            if dataset_entry is not None and dataset_entry[0] == cache_key and dataset_entry[1].append_log:
+                # 已追加过新订单时沿用合并后的数据，不被原文件覆盖
+                df_clean = dataset_entry[1].data
             st.session_state.raw_data = df_clean
             st.session_state.current_file = uploaded_file.name
+            if st.session_state.data_cache_key != cache_key:
+                # 结果缓存按数据指纹分键且为进程内共享，旧数据的结果可能仍被其他会话使用，只靠 LRU 淘汰
+                st.session_state.data_cache_key = cache_key
+                st.session_state.data_fingerprint = dataset_fingerprint(df_clean)
 
-            st.success(f"文件上传成功！共 {len(df)} 条记录，{len(df.columns)} 个字段")
+            st.success(f"文件上传成功！共 {len(df_clean)} 条记录，{len(df_clean.columns)} 个字段")
 
             col1, col2 = st.columns(2)
             with col1:
                 st.subheader("原始数据预览")
-                st.dataframe(df.head())
+                if df is not None:
+                    st.dataframe(df.head())
+                else:
+                    st.caption("数据来自缓存，无原始数据预览")
             with col2:
                 st.subheader("清洗后数据预览")
                 st.dataframe(df_clean.head())
 
             if st.button("🚀 开始数据预处理", type="primary"):
                 with st.spinner("正在执行数据预处理..."):
-                    task1 = Task1Preprocessor(df_clean)
+                    task1 = Task1Preprocessor(df_clean, model_store=get_model_store())
                     result_files, progress_log = task1.generate_all_results()
 
                     if result_files:
@@ -190,6 +337,32 @@ def show_task1_preprocessing():
                                 mime="text/csv"
                             )
 
+            st.subheader("➕ 追加新订单")
+            batch_file = st.file_uploader("上传新增订单（字段与原表一致）", type=["xlsx", "csv"], key="append_file")
+            if batch_file is not None and st.button("追加到当前数据"):
+                with st.spinner("正在清洗并合并新订单..."):
+                    dataset = get_incremental_dataset(cache_key)
+                    if batch_file.name.endswith('.xlsx'):
+                        batch = read_excel_fast(batch_file.getvalue(), sheet_name=None if all_sheets else 0)
+                    else:
+                        batch = pd.read_csv(batch_file)
+                    if dataset.append(batch, batch_key=hash_bytes(batch_file)) is None:
+                        st.info("该批次已追加过，已跳过")
+                    else:
+                        st.session_state.raw_data = dataset.data
+                        st.session_state.data_fingerprint = dataset.fingerprint
+                        log = dataset.append_log[-1]
+                        st.success(f"✅ 已追加 {log['行数']} 行，耗时 {log['耗时(秒)']:.2f} 秒，当前共 {dataset.row_count} 行")
+
+            dataset_entry = st.session_state.incremental_dataset
+            if dataset_entry is not None and dataset_entry[0] == cache_key and dataset_entry[1].append_log:
+                dataset = dataset_entry[1]
+                with st.expander("增量统计（缺失值、品类 ABC、标准化参数）"):
+                    st.dataframe(dataset.missing_value_report())
+                    st.dataframe(dataset.abc_classification())
+                    st.dataframe(dataset.standardization_stats())
+                    st.dataframe(pd.DataFrame(dataset.append_log))
+
         except Exception as e:
             st.error(f"文件处理错误: {str(e)}")
 
@@ -200,19 +373,21 @@ def show_task2_analysis():
         st.warning("请先在数据预处理页面上传数据")
         return
     
-    analyzer = Task2Analyzer(st.session_state.raw_data)
+    data, load_cube = st.session_state.raw_data, cube_loader()
+    results = run_memoized(
+        'task2', SETTINGS['analysis'], "执行多维分析", "正在执行多维分析...",
+        lambda progress: Task2Analyzer(data, cube=load_cube()).perform_analysis(progress=progress)
+    )
     
-    if st.button("执行多维分析", type="primary"):
-        with st.spinner("正在执行多维分析..."):
-            results = analyzer.perform_analysis()
-            st.session_state.task2_completed = True
-            st.success("✅ 多维分析完成！")
-            
-            for key, value in results.items():
-                if hasattr(value, 'shape'):
-                    st.write(f"{key}: {value.shape}")
-                else:
-                    st.write(f"{key}: {type(value)}")
+    if results is not None:
+        st.session_state.task2_completed = True
+        st.success("✅ 多维分析完成！")
+        
+        for key, value in results.items():
+            if hasattr(value, 'shape'):
+                st.write(f"{key}: {value.shape}")
+            else:
+                st.write(f"{key}: {type(value)}")
 
 def show_task3_forecasting():
     st.header("📈 任务3: 销售预测")
@@ -221,14 +396,52 @@ def show_task3_forecasting():
         st.warning("请先在数据预处理页面上传数据")
         return
     
-    forecaster = Task3Forecaster(st.session_state.raw_data)
+    auto_order = st.checkbox("自动选择 ARIMA 阶数（按 AIC 并行逐步搜索）", value=SETTINGS['forecasting']['auto_order'])
+    data, load_cube = st.session_state.raw_data, cube_loader()
+    model_store, feature_store = get_model_store(), get_feature_store()
+    results = run_memoized(
+        'task3', dict(SETTINGS['forecasting'], auto_order=auto_order), "执行销售预测", "正在执行销售预测...",
+        lambda progress: Task3Forecaster(
+            data, cube=load_cube(), model_store=model_store, feature_store=feature_store
+        ).perform_forecasting(auto_order=auto_order, progress=progress)
+    )
     
-    if st.button("执行销售预测", type="primary"):
-        with st.spinner("正在执行销售预测..."):
-            results = forecaster.perform_forecasting()
-            st.session_state.task3_completed = True
-            st.success("✅ 销售预测完成！")
-            st.write(f"预测精度: {results.get('mape', 'N/A')}%")
+    if results is not None:
+        st.session_state.task3_completed = True
+        st.success("✅ 销售预测完成！")
+        st.write(f"预测精度: {results.get('mape', 'N/A')}%")
+        st.write(f"ARIMA 阶数: {results.get('arima_order')}")
+        search = results.get('order_search')
+        if search is not None:
+            st.caption(f"搜索拟合 {search['fits']} 个阶数（网格共 {search['grid_size']} 个），耗时 {search['elapsed_seconds']:.2f} 秒")
+            st.dataframe(search['candidates'])
+
+    st.subheader("滚动起点回测")
+    backtest = run_memoized(
+        'task3_backtest', SETTINGS['forecasting'], "执行滚动回测", "正在并行回测各折...",
+        lambda progress: Task3Forecaster(data, cube=load_cube()).backtest(progress=progress)
+    )
+    if backtest is not None:
+        col1, col2, col3 = st.columns(3)
+        col1.metric("平均 MAPE", f"{backtest['mean_mape']:.2f}%", f"±{backtest['std_mape']:.2f}", delta_color="off")
+        col2.metric("ARIMA 单独 MAPE", f"{backtest['mean_arima_mape']:.2f}%")
+        col3.metric("总耗时（秒）", f"{backtest['elapsed_seconds']:.2f}")
+        st.dataframe(backtest['folds'])
+
+    st.subheader("分层批量预测（品类 × 省份）")
+    batch = run_memoized(
+        'task3_batch', SETTINGS['forecasting'], "执行分层批量预测", "正在并行拟合各序列...",
+        lambda progress: Task3Forecaster(data, cube=load_cube()).batch_forecast(progress=progress)
+    )
+    if batch is not None:
+        col1, col2, col3 = st.columns(3)
+        col1.metric("序列数", batch['series_count'])
+        col2.metric("吞吐量（序列/秒）", f"{batch['series_per_second']:.1f}")
+        col3.metric("总计 MAPE", f"{batch['total_mape']:.2f}%")
+        st.dataframe(batch['reconciled']['总计'])
+        if batch['failed_count']:
+            st.warning(f"{batch['failed_count']} 条序列拟合失败，已用训练均值代替")
+            st.dataframe(batch['failures'])
 
 def show_task4_optimization():
     st.header("💡 任务4: 运营优化")
@@ -237,18 +450,20 @@ def show_task4_optimization():
         st.warning("请先在数据预处理页面上传数据")
         return
     
-    optimizer = Task4Optimizer(st.session_state.raw_data)
+    data, load_cube = st.session_state.raw_data, cube_loader()
+    results = run_memoized(
+        'task4', None, "执行运营优化", "正在执行运营优化...",
+        lambda progress: Task4Optimizer(data, cube=load_cube()).perform_optimization(progress=progress)
+    )
     
-    if st.button("执行运营优化", type="primary"):
-        with st.spinner("正在执行运营优化..."):
-            results = optimizer.perform_optimization()
-            st.session_state.task4_completed = True
-            st.success("✅ 运营优化完成！")
-            
-            if 'strategies' in results:
-                st.subheader("运营策略推荐")
-                for strategy in results['strategies']:
-                    st.write(f"▪️ {strategy}")
+    if results is not None:
+        st.session_state.task4_completed = True
+        st.success("✅ 运营优化完成！")
+        
+        if 'strategies' in results:
+            st.subheader("运营策略推荐")
+            for strategy in results['strategies']:
+                st.write(f"▪️ {strategy}")
 
 def show_system_status():
     st.header("🔧 系统状态")
@@ -277,6 +492,58 @@ def show_system_status():
         else:
             st.info("暂无数据")
 
+    st.subheader("数据缓存")
+    cache_stats = get_dataset_cache().stats()
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("命中次数", cache_stats['hits'])
+    col2.metric("未命中次数", cache_stats['misses'])
+    col3.metric("缓存条目", cache_stats['entries'])
+    col4.metric("占用空间", f"{cache_stats['size_bytes'] / 1024 ** 2:.1f} / {cache_stats['max_bytes'] / 1024 ** 2:.0f} MB")
+    if st.button("清空数据缓存"):
+        get_dataset_cache().clear()
+        st.success("数据缓存已清空")
+
+    st.subheader("结果缓存")
+    result_stats = get_result_cache().stats()
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("命中次数", result_stats['hits'])
+    col2.metric("未命中次数", result_stats['misses'])
+    col3.metric("缓存条目", result_stats['entries'])
+    col4.metric("占用内存", f"{result_stats['size_bytes'] / 1024 ** 2:.1f} / {result_stats['max_bytes'] / 1024 ** 2:.0f} MB")
+    if st.button("清空结果缓存"):
+        get_result_cache().clear()
+        st.success("结果缓存已清空")
+
+    st.subheader("后台任务")
+    jobs = get_job_scheduler().jobs()
+    if jobs:
+        st.dataframe(pd.DataFrame([
+            {
+                '任务': snapshot['name'],
+                '状态': snapshot['status'],
+                '进度': f"{snapshot['progress'] * 100:.0f}%",
+                '当前阶段': snapshot['stage'] or '',
+                '耗时(秒)': round(snapshot['elapsed_seconds'], 2),
+                '错误': snapshot['error'] or ''
+            }
+            for snapshot in (job.snapshot() for job in reversed(jobs))
+        ]), hide_index=True)
+        if st.button("清除已结束的任务"):
+            get_job_scheduler().clear_finished()
+    else:
+        st.info("暂无后台任务")
+
+    st.subheader("模型存储")
+    model_stats = get_model_store().stats()
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("命中次数", model_stats['hits'])
+    col2.metric("未命中次数", model_stats['misses'])
+    col3.metric("模型数量", model_stats['entries'])
+    col4.metric("占用空间", f"{model_stats['size_bytes'] / 1024 ** 2:.1f} / {model_stats['max_bytes'] / 1024 ** 2:.0f} MB")
+    if st.button("清空模型存储"):
+        get_model_store().clear()
+        st.success("模型存储已清空")
+
 if __name__ == "__main__":
     main()
 
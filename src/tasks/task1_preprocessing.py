@@ -1,12 +1,15 @@
 import pandas as pd
 import numpy as np
-from sklearn.preprocessing import StandardScaler, MinMaxScaler
-from src.core.data_processor import DataProcessor
+from config.constants import CONSTANTS
+from src.core.data_processor import DataProcessor, parse_numeric_strings
 
 class Task1Preprocessor:
-    def __init__(self, df):
+    # 缺失值统计与处理后数据覆盖全部字段，需要读入所有列
+    REQUIRED_COLUMNS = None
+
+    def __init__(self, df, model_store=None):
         self.df = df.copy()
-        self.processor = DataProcessor()
+        self.processor = DataProcessor(model_store=model_store)
         self.results = {}
     
     def step1_missing_value_analysis(self):
@@ -18,17 +21,18 @@ class Task1Preprocessor:
         df_step2 = self.df.copy()
         
         if '进货价格' in df_step2.columns:
-            df_step2['进货价格'] = df_step2['进货价格'].apply(
-                lambda x: float(re.sub(r'[^\d\.]', '', str(x))) if re.search(r'[\d\.]', str(x)) else None
-            )
+            df_step2['进货价格'] = parse_numeric_strings(df_step2['进货价格'])
             df_step2['进货价格'] = df_step2['进货价格'].round().astype('Int64')
             
             if df_step2['进货价格'].isnull().sum() > 0:
                 if '商品品类' in df_step2.columns:
-                    category_price = df_step2.groupby('商品品类')['进货价格'].transform('median')
-                    df_step2['进货价格'] = df_step2['进货价格'].fillna(category_price)
+                    category_price = df_step2.groupby('商品品类', observed=True)['进货价格'].transform('median')
+                    df_step2['进货价格'] = df_step2['进货价格'].fillna(category_price.round().astype('Int64'))
                 else:
-                    df_step2['进货价格'] = df_step2['进货价格'].fillna(df_step2['进货价格'].median())
+                    # 整列缺失时中位数为 NA，无可填充的值，保持缺失
+                    median = df_step2['进货价格'].median()
+                    if not pd.isna(median):
+                        df_step2['进货价格'] = df_step2['进货价格'].fillna(round(median))
 
         self.results['price_processed'] = df_step2
         return df_step2
@@ -36,11 +40,7 @@ class Task1Preprocessor:
     def step5_standardization(self, df_step4):
         df_original = df_step4.copy()
 
-        required_cols = ["进货价格", "实际售价", "销售数", "利润"]
-        if "销售额" in df_original.columns:
-            required_cols.append("销售额")
-
-        numeric_cols = [col for col in required_cols if col in df_original.columns and
+        numeric_cols = [col for col in CONSTANTS['STANDARDIZE_COLUMNS'] if col in df_original.columns and
                         pd.api.types.is_numeric_dtype(df_original[col])]
 
         if not numeric_cols:
@@ -48,13 +48,8 @@ class Task1Preprocessor:
             self.results['step5_zscore'] = df_original
             return df_original, df_original
 
-        df_zscore = df_original.copy()
-        scaler_z = StandardScaler()
-        df_zscore[numeric_cols] = scaler_z.fit_transform(df_zscore[numeric_cols])
-
-        df_minmax = df_original.copy()
-        scaler_mm = MinMaxScaler(feature_range=(0, 1))
-        df_minmax[numeric_cols] = scaler_mm.fit_transform(df_minmax[numeric_cols])
+        df_zscore = self.processor.scale_numeric(df_original, numeric_cols, method='zscore')
+        df_minmax = self.processor.scale_numeric(df_original, numeric_cols, method='minmax')
 
         self.results['step5_minmax'] = df_minmax
         self.results['step5_zscore'] = df_zscore
@@ -1,14 +1,20 @@
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
+from matplotlib.figure import Figure
 import seaborn as sns
 from src.core.analyzer import Analyzer
+from src.core.regions import enrich_regions
 from src.core.visualizer import Visualizer
 
 class Task2Analyzer:
-    def __init__(self, df):
-        self.df = df.copy()
-        self.analyzer = Analyzer(df)
+    # 聚类与相关性分析使用全部数值列，需要读入所有列
+    REQUIRED_COLUMNS = None
+
+    def __init__(self, df, cube=None):
+        # 上游已补充地域字段时直接复用，否则在这里解析一次
+        self.df = enrich_regions(df.copy(), copy=False)
+        self.cube = cube
+        self.analyzer = Analyzer(self.df, copy=False, cube=cube)
         self.visualizer = Visualizer()
         self.results = {}
     
@@ -16,29 +22,29 @@ class Task2Analyzer:
         figs = {}
         
         if all(col in self.df.columns for col in ['区域', '商品品类', '利润']):
-            if self.df['区域'].str.contains('-').any():
-                self.df['省份'] = self.df['区域'].apply(lambda x: x.split('-')[1] if '-' in str(x) else x)
+            if self.cube is not None and {'商品品类', '省份'} <= set(self.cube.dimensions) and '利润' in self.cube.measures:
+                category_province_pivot = self.cube.pivot('商品品类', '省份', '利润')
             else:
-                self.df['省份'] = self.df['区域']
-
-            self.df['利润'] = pd.to_numeric(self.df['利润'], errors='coerce')
-            self.df = self.df.dropna(subset=['利润'])
+                self.df['利润'] = pd.to_numeric(self.df['利润'], errors='coerce')
+                self.df = self.df.dropna(subset=['利润'])
 
-            category_province_pivot = self.df.pivot_table(
-                index='商品品类',
-                columns='省份',
-                values='利润',
-                aggfunc='sum',
-                fill_value=0
-            )
+                category_province_pivot = self.df.pivot_table(
+                    index='商品品类',
+                    columns='省份',
+                    values='利润',
+                    aggfunc='sum',
+                    fill_value=0,
+                    observed=True
+                )
 
             if not category_province_pivot.empty and len(category_province_pivot) > 1:
-                plt.figure(figsize=(12, 8))
-                sns.heatmap(category_province_pivot, cmap='Blues', annot=False)
-                plt.title('商品品类和省份交叉的利润热力图')
-                plt.tight_layout()
-                figs['category_province_profit'] = plt.gcf()
-                plt.close()
+                # 分析在后台线程中运行，直接创建 Figure，不经过 pyplot 的全局当前图状态
+                fig = Figure(figsize=(12, 8))
+                ax = fig.subplots()
+                sns.heatmap(category_province_pivot, cmap='Blues', annot=False, ax=ax)
+                ax.set_title('商品品类和省份交叉的利润热力图')
+                fig.tight_layout()
+                figs['category_province_profit'] = fig
 
         self.results['heatmaps'] = figs
         return len(figs) > 0
@@ -50,21 +56,23 @@ class Task2Analyzer:
         if '区域' not in self.df.columns:
             return None
 
-        if self.df['区域'].str.contains('-').any():
-            self.df['城市'] = self.df['区域'].apply(lambda x: x.split('-')[1] if '-' in str(x) else x)
-        else:
-            self.df['城市'] = self.df['区域']
-
         city_stats = self.df['城市'].value_counts().reset_index()
         city_stats.columns = ['城市', '用户数']
         return city_stats.head(15)
     
-    def perform_analysis(self):
+    def perform_analysis(self, progress=None):
+        report = progress or (lambda stage, fraction: None)
         results = {}
         
+        report('热力图', 0.0)
         results['heatmaps_created'] = self.create_heatmaps()
+        report('聚类分析', 0.2)
         results['clustering'] = self.perform_clustering_analysis()
+        report('城市分布', 0.6)
         results['city_distribution'] = self.generate_city_distribution_data()
+        report('相关性矩阵', 0.7)
         results['correlations'] = self.analyzer.calculate_correlations()
+        report('强相关字段对', 0.85)
+        results['correlated_pairs'] = self.analyzer.find_correlated_pairs()
         
         return results
@@ -1,13 +1,151 @@
+import math
+import os
+import time
+import warnings
 import pandas as pd
 import numpy as np
 from sklearn.ensemble import RandomForestRegressor
 from sklearn.metrics import mean_absolute_percentage_error
 from statsmodels.tsa.arima.model import ARIMA
 from xgboost import XGBRegressor
+from config.settings import SETTINGS
+from src.core.order_search import search_arima_order
+from src.core.features import DailyFeatureStore, complete_days, roll_forward
+from src.utils.job_scheduler import process_pool
+
+def fit_arima(y_train, order=None, model_store=None):
+    order = tuple(order or SETTINGS['forecasting']['arima_order'])
+    y_train = np.asarray(y_train, dtype=np.float64)
+    
+    def fit():
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore')
+            return ARIMA(y_train, order=order).fit()
+    
+    if model_store is None:
+        return fit()
+    return model_store.get_or_fit(model_store.model_key('arima', y_train, order), fit)
+
+def arima_forecast(y_train, steps, order=None, model_store=None):
+    arima_fit = fit_arima(y_train, order, model_store)
+    return np.asarray(arima_fit.forecast(steps=steps), dtype=np.float64)
+
+def masked_mape(y_true, y_pred):
+    # 实际值为 0 的日期（包括补 0 的缺失日期）百分比误差无定义，不参与计算
+    y_true, y_pred = np.asarray(y_true, dtype=np.float64), np.asarray(y_pred, dtype=np.float64)
+    mask = y_true != 0
+    if not mask.any():
+        return float('nan')
+    return mean_absolute_percentage_error(y_true[mask], y_pred[mask]) * 100
+
+def hybrid_predict(y_train, train_features, test_days, order=None, model_store=None, lags=None, windows=None):
+    # ARIMA 给出趋势预测，XGBoost 在对齐的每日特征上拟合 ARIMA 的逐日残差；分别记录各组件耗时
+    # y_train 须是补齐日期后的连续序列，test_days 为紧随其后的连续日期
+    settings = SETTINGS['forecasting']
+    order = tuple(order or settings['arima_order'])
+    lags = sorted(set(lags or settings['feature_lags']))
+    windows = sorted(set(windows or settings['rolling_windows']))
+    y_train = np.asarray(y_train, dtype=np.float64)
+    steps = len(test_days)
+    timings = {'arima_fit': 0.0, 'arima_predict': 0.0, 'xgb_fit': 0.0, 'xgb_predict': 0.0}
+    errors = []
+    
+    start = time.perf_counter()
+    try:
+        arima_fit = fit_arima(y_train, order, model_store)
+        timings['arima_fit'] = time.perf_counter() - start
+        start = time.perf_counter()
+        arima_pred = np.asarray(arima_fit.forecast(steps=steps), dtype=np.float64)
+        arima_train_fit = np.asarray(arima_fit.fittedvalues, dtype=np.float64)
+        timings['arima_predict'] = time.perf_counter() - start
+    except Exception as e:
+        timings['arima_fit'] = time.perf_counter() - start
+        errors.append(f"ARIMA: {type(e).__name__}: {e}")
+        arima_pred = np.full(steps, y_train.mean())
+        arima_train_fit = np.full_like(y_train, y_train.mean())
+    
+    residuals = y_train - arima_train_fit
+    # 差分模型的前 d 个拟合值没有意义，不参与残差训练
+    usable = np.isfinite(residuals)
+    usable[:order[1]] = False
+    if usable.sum() < 3 or steps == 0:
+        return arima_pred, arima_pred, timings, errors
+    
+    start = time.perf_counter()
+    xgb_model = XGBRegressor(random_state=42)
+    fit_features, labels = train_features[usable], residuals[usable]
+    if model_store is None:
+        xgb_model.fit(fit_features, labels)
+    else:
+        key = model_store.model_key('xgboost', (fit_features, labels), xgb_model)
+        xgb_model = model_store.get_or_fit(key, lambda: xgb_model.fit(fit_features, labels))
+    timings['xgb_fit'] = time.perf_counter() - start
+    start = time.perf_counter()
+    # 预测期特征逐日递推生成，残差模型看不到测试期的真实值
+    final_pred, _ = roll_forward(
+        y_train, test_days, lags, windows,
+        lambda step, row: arima_pred[step] + xgb_model.predict(row)[0]
+    )
+    timings['xgb_predict'] = time.perf_counter() - start
+    return final_pred, arima_pred, timings, errors
+
+def _backtest_fold(fold, y, features, order, lags=None, windows=None):
+    # 训练行特征只用折起点之前的值；测试行特征在 hybrid_predict 中由预测值递推，不取 features 中的测试行
+    final_pred, arima_pred, timings, errors = hybrid_predict(
+        y[fold['train']], features.iloc[fold['train']], fold['test_days'], order,
+        lags=lags, windows=windows
+    )
+    y_test = y[fold['test']]
+    return {
+        '折': fold['fold'],
+        '训练天数': len(fold['train']),
+        '测试起始日': fold['test_days'][0],
+        '测试结束日': fold['test_days'][-1],
+        'MAPE': masked_mape(y_test, final_pred),
+        'ARIMA_MAPE': masked_mape(y_test, arima_pred),
+        'ARIMA拟合(秒)': timings['arima_fit'],
+        'ARIMA预测(秒)': timings['arima_predict'],
+        'XGBoost拟合(秒)': timings['xgb_fit'],
+        'XGBoost预测(秒)': timings['xgb_predict'],
+        '错误': '; '.join(errors) or None
+    }
+
+def _forecast_series_batch(series_batch, steps, order):
+    # 子进程内逐条拟合，单条失败只记录错误并以训练均值兜底，不影响同批其他序列
+    outcomes = []
+    for index, y_train in series_batch:
+        start = time.perf_counter()
+        try:
+            forecast = arima_forecast(y_train, steps, order)
+            error = None
+        except Exception as e:
+            forecast = np.full(steps, float(np.mean(y_train)) if len(y_train) else 0.0)
+            error = f"{type(e).__name__}: {e}"
+        if not np.all(np.isfinite(forecast)):
+            forecast = np.full(steps, float(np.mean(y_train)) if len(y_train) else 0.0)
+            error = error or "预测结果包含非有限值"
+        outcomes.append((index, forecast, error, time.perf_counter() - start))
+    return outcomes
+
+def _collect_with_progress(outcomes, total, label, report):
+    # 结果按提交顺序逐个返回：每完成一项即进入下一项的阶段，进度按已完成项数计算
+    results = []
+    report(f"{label} 1/{total}", 0.0)
+    for done, outcome in enumerate(outcomes, start=1):
+        results.append(outcome)
+        if done < total:
+            report(f"{label} {done + 1}/{total}", done / total)
+    return results
 
 class Task3Forecaster:
-    def __init__(self, df):
+    # 每日利润序列，以及分层批量预测用到的 品类×省份（省份由区域解析）
+    REQUIRED_COLUMNS = ['日期', '利润', '商品品类', '区域']
+
+    def __init__(self, df, cube=None, model_store=None, feature_store=None):
         self.df = df.copy()
+        self.cube = cube
+        self.model_store = model_store
+        self.feature_store = feature_store if feature_store is not None else DailyFeatureStore()
         self.results = {}
     
     def prepare_time_series_data(self):
@@ -17,7 +155,12 @@ class Task3Forecaster:
         self.df['日期'] = pd.to_numeric(self.df['日期'], errors='coerce')
         self.df = self.df.dropna(subset=['日期'])
         
-        daily_profit = self.df.groupby('日期')['利润'].sum().reset_index()
+        if self.cube is not None and '日期' in self.cube.dimensions and '利润' in self.cube.measures:
+            daily_profit = self.cube.rollup(['日期'], ['利润'])
+            daily_profit['日期'] = pd.to_numeric(daily_profit['日期'], errors='coerce')
+            daily_profit = daily_profit.dropna(subset=['日期']).groupby('日期')['利润'].sum().reset_index()
+        else:
+            daily_profit = self.df.groupby('日期')['利润'].sum().reset_index()
         daily_profit = daily_profit.rename(columns={'利润': '每日总利润'})
         
         train = daily_profit[daily_profit['日期'] <= 24]
@@ -34,38 +177,36 @@ class Task3Forecaster:
         
         return True
     
+    def select_arima_order(self, y_train=None, max_workers=None):
+        y_train = self.results['y_train'] if y_train is None else y_train
+        search = search_arima_order(y_train, max_workers=max_workers)
+        self.results['order_search'] = search
+        self.results['arima_order'] = search['order']
+        return search['order']
+    
     def hybrid_forecast(self):
         train = self.results['train_data']
         test = self.results['test_data']
-        y_train = self.results['y_train']
         y_test = self.results['y_test']
         
-        try:
-            arima_model = ARIMA(y_train, order=(2, 1, 2))
-            arima_fit = arima_model.fit()
-            arima_test_pred = arima_fit.forecast(steps=len(y_test))
-        except:
-            arima_test_pred = np.full_like(y_test, y_train.mean())
-        
-        features = ['进货价格', '销售数', '客户年龄']
-        existing_features = [col for col in features if col in self.df.columns]
+        # 特征只由训练期的每日汇总生成；预测期按连续日期逐日递推，再取出测试集中的日期
+        daily = complete_days(self.results['time_series_data'].set_index('日期')['每日总利润'])
+        split_day = train['日期'].max()
+        train_daily = daily[daily.index <= split_day]
+        future_days = daily.index[daily.index > split_day]
+        train_features = self._daily_features(train_daily)
         
-        if len(existing_features) > 0:
-            train_features = self.df[self.df['日期'] <= 24][existing_features].fillna(0)
-            test_features = self.df[self.df['日期'] > 24][existing_features].fillna(0)
-            
-            if len(train_features) > 0 and len(test_features) > 0:
-                xgb_model = XGBRegressor(random_state=42)
-                xgb_model.fit(train_features, y_train[:len(train_features)])
-                xgb_residual_pred = xgb_model.predict(test_features)
-                
-                final_pred = arima_test_pred + xgb_residual_pred
-            else:
-                final_pred = arima_test_pred
-        else:
-            final_pred = arima_test_pred
+        future_pred, _, timings, errors = hybrid_predict(
+            train_daily.to_numpy(dtype=np.float64), train_features, future_days,
+            self.results.get('arima_order'), self.model_store,
+            self.feature_store.lags, self.feature_store.windows
+        )
+        final_pred = pd.Series(future_pred, index=future_days).reindex(test['日期'].to_numpy()).to_numpy()
+        self.results['timings'] = timings
+        if errors:
+            self.results.setdefault('errors', []).extend(errors)
         
-        mape = mean_absolute_percentage_error(y_test, final_pred) * 100
+        mape = masked_mape(y_test, final_pred)
         
         self.results['final_pred'] = final_pred
         self.results['mape'] = mape
@@ -74,21 +215,190 @@ class Task3Forecaster:
             '日期': test['日期'],
             '实际每日总利润': y_test,
             '预测利润': final_pred,
-            '相对误差(%)': np.abs(y_test - final_pred) / y_test * 100
+            '相对误差(%)': np.abs(y_test - final_pred) / np.abs(np.where(y_test == 0, np.nan, y_test)) * 100
         })
         self.results['detailed_results'] = results_df
         
         return True
     
-    def perform_forecasting(self):
+    def _daily_features(self, daily=None):
+        if daily is None:
+            daily = self.results['time_series_data'].set_index('日期')['每日总利润']
+        features = self.feature_store.update(daily)
+        self.results['features'] = features
+        return features
+    
+    def backtest(self, n_folds=None, horizon=None, window=None, min_train=None, max_workers=None, progress=None):
+        report = progress or (lambda stage, fraction: None)
+        settings = SETTINGS['forecasting']
+        n_folds = n_folds or settings['backtest_folds']
+        horizon = horizon or settings['backtest_horizon']
+        window = window or settings['backtest_window']
+        min_train = min_train or settings['backtest_min_train']
+        max_workers = max_workers or settings['backtest_workers'] or os.cpu_count() or 1
+        if 'time_series_data' not in self.results and not self.prepare_time_series_data():
+            return None
+        
+        # 特征第 t 行只依赖 t 之前的值，全序列算一次即可供各折的训练行切片使用；
+        # 测试行特征依赖测试期真实值，由各折用自己的预测值递推生成
+        # 特征存储可能被同一会话的其他任务并发更新，目标值由同一份补齐后的序列得到，不读存储的状态
+        daily = complete_days(self.results['time_series_data'].set_index('日期')['每日总利润'])
+        features = self._daily_features(daily)
+        y = daily.to_numpy(dtype=np.float64)
+        days = features.index.to_numpy()
+        
+        # 滚动起点：最后 n_folds 个长度为 horizon 的区间依次作为测试集；
+        # expanding 训练集从第一天开始，sliding 训练集固定为最近 min_train 天
+        folds = []
+        for fold in range(n_folds):
+            test_end = len(y) - (n_folds - 1 - fold) * horizon
+            test_start = test_end - horizon
+            train_start = 0 if window == 'expanding' else max(0, test_start - min_train)
+            if test_start - train_start < min_train:
+                continue
+            folds.append({
+                'fold': fold + 1,
+                'train': np.arange(train_start, test_start),
+                'test': np.arange(test_start, test_end),
+                'test_days': days[test_start:test_end]
+            })
+        if not folds:
+            return None
+        
+        order = self.results.get('arima_order')
+        lags, windows = self.feature_store.lags, self.feature_store.windows
+        start = time.perf_counter()
+        if max_workers == 1 or len(folds) == 1:
+            outcomes = (_backtest_fold(fold, y, features, order, lags, windows) for fold in folds)
+            rows = _collect_with_progress(outcomes, len(folds), '回测折', report)
+        else:
+            with process_pool(min(max_workers, len(folds))) as executor:
+                outcomes = executor.map(
+                    _backtest_fold, folds, [y] * len(folds), [features] * len(folds), [order] * len(folds),
+                    [lags] * len(folds), [windows] * len(folds)
+                )
+                rows = _collect_with_progress(outcomes, len(folds), '回测折', report)
+        elapsed = time.perf_counter() - start
+        
+        fold_table = pd.DataFrame(rows)
+        timing_cols = ['ARIMA拟合(秒)', 'ARIMA预测(秒)', 'XGBoost拟合(秒)', 'XGBoost预测(秒)']
+        backtest_results = {
+            'folds': fold_table,
+            'mean_mape': float(fold_table['MAPE'].mean()),
+            'std_mape': float(fold_table['MAPE'].std(ddof=1)) if fold_table['MAPE'].count() > 1 else 0.0,
+            'mean_arima_mape': float(fold_table['ARIMA_MAPE'].mean()),
+            'component_seconds': fold_table[timing_cols].sum().to_dict(),
+            'fit_seconds': float(fold_table[timing_cols].to_numpy().sum()),
+            'elapsed_seconds': elapsed,
+            'window': window,
+            'horizon': horizon,
+            'workers': max_workers
+        }
+        self.results['backtest'] = backtest_results
+        return backtest_results
+    
+    def _series_frame(self, levels):
+        if self.cube is not None and set(levels + ['日期']) <= set(self.cube.dimensions) and '利润' in self.cube.measures:
+            series = self.cube.rollup(levels + ['日期'], ['利润'])
+        else:
+            series = self.df.groupby(levels + ['日期'], observed=True, sort=False)['利润'].sum().reset_index()
+        series['日期'] = pd.to_numeric(series['日期'], errors='coerce')
+        return series.dropna(subset=['日期'])
+
+    def batch_forecast(self, levels=None, max_workers=None, batch_size=None, order=None, progress=None):
+        report = progress or (lambda stage, fraction: None)
+        settings = SETTINGS['forecasting']
+        levels = [col for col in (levels or settings['hierarchy_levels']) if col in self.df.columns]
+        if not levels or '日期' not in self.df.columns or '利润' not in self.df.columns:
+            return None
+        max_workers = max_workers or settings['batch_workers'] or os.cpu_count() or 1
+        batch_size = batch_size or settings['batch_size']
+        order = order or self.results.get('arima_order')
+
+        # 一次性把长表展开成 序列 × 日期 的稠密矩阵，缺失日期记为 0
+        series = self._series_frame(levels)
+        series_codes, series_keys = pd.factorize(pd.MultiIndex.from_frame(series[levels]))
+        day_codes, days = pd.factorize(series['日期'], sort=True)
+        matrix = np.zeros((len(series_keys), len(days)))
+        np.add.at(matrix, (series_codes, day_codes), series['利润'].to_numpy(dtype=np.float64))
+
+        n_test = max(1, int(math.ceil(len(days) * settings['test_size'])))
+        if len(days) - n_test < 3:
+            return None
+        train, test = matrix[:, :-n_test], matrix[:, -n_test:]
+
+        start = time.perf_counter()
+        items = list(enumerate(train))
+        batches = [items[i:i + batch_size] for i in range(0, len(items), batch_size)]
+        forecasts = np.zeros_like(test)
+        errors = {}
+        fit_seconds = 0.0
+        if max_workers == 1 or len(batches) == 1:
+            outcomes = (_forecast_series_batch(batch, n_test, order) for batch in batches)
+            outcomes = _collect_with_progress(outcomes, len(batches), '拟合批次', report)
+        else:
+            with process_pool(min(max_workers, len(batches))) as executor:
+                outcomes = executor.map(
+                    _forecast_series_batch, batches, [n_test] * len(batches), [order] * len(batches)
+                )
+                outcomes = _collect_with_progress(outcomes, len(batches), '拟合批次', report)
+        report('层级汇总', 1.0)
+        for batch_outcomes in outcomes:
+            for index, forecast, error, seconds in batch_outcomes:
+                forecasts[index] = forecast
+                fit_seconds += seconds
+                if error is not None:
+                    errors[index] = error
+        elapsed = time.perf_counter() - start
+
+        keys = series_keys.to_frame(index=False, name=levels)
+        test_days = days[-n_test:]
+        detail = keys.loc[keys.index.repeat(n_test)].reset_index(drop=True)
+        detail['日期'] = np.tile(test_days, len(keys))
+        detail['实际利润'] = test.ravel()
+        detail['预测利润'] = forecasts.ravel()
+
+        # 自底向上汇总：上层序列等于其下所有底层序列预测之和，保证层级一致
+        reconciled = {'总计': detail.groupby('日期')[['实际利润', '预测利润']].sum().reset_index()}
+        for level in levels:
+            reconciled[level] = detail.groupby([level, '日期'], observed=True)[['实际利润', '预测利润']].sum().reset_index()
+        total = reconciled['总计']
+        total_mape = masked_mape(total['实际利润'], total['预测利润'])
+
+        failures = keys.loc[sorted(errors)].assign(错误=[errors[index] for index in sorted(errors)]).reset_index(drop=True)
+        batch_results = {
+            'forecasts': detail,
+            'reconciled': reconciled,
+            'failures': failures,
+            'series_count': len(keys),
+            'failed_count': len(errors),
+            'total_mape': total_mape,
+            'elapsed_seconds': elapsed,
+            'fit_seconds': fit_seconds,
+            'series_per_second': len(keys) / elapsed if elapsed > 0 else float('inf'),
+            'workers': max_workers
+        }
+        self.results['batch_forecast'] = batch_results
+        return batch_results
+    
+    def perform_forecasting(self, auto_order=None, progress=None):
+        report = progress or (lambda stage, fraction: None)
+        report('准备时间序列', 0.0)
         if not self.prepare_time_series_data():
             return {'error': '时间序列数据准备失败'}
+        
+        if SETTINGS['forecasting']['auto_order'] if auto_order is None else auto_order:
+            report('ARIMA 阶数搜索', 0.1)
+            self.select_arima_order()
             
+        report('混合预测', 0.5)
         if not self.hybrid_forecast():
             return {'error': '混合预测失败'}
             
         return {
             'mape': self.results['mape'],
             'predictions': len(self.results['final_pred']),
+            'arima_order': tuple(self.results.get('arima_order') or SETTINGS['forecasting']['arima_order']),
+            'order_search': self.results.get('order_search'),
             'details': self.results['detailed_results']
         }
@@ -1,71 +1,53 @@
 import pandas as pd
 import numpy as np
+from config.constants import CONSTANTS
+from src.core.classification import ABC_STRATEGIES, abc_xyz_classification, category_abc_table
+from src.core.elasticity import grouped_price_sensitivity
 
 class Task4Optimizer:
-    def __init__(self, df):
+    # 分区读取时只投影这些列；SKU 列不存在时自动跳过
+    REQUIRED_COLUMNS = ['商品品类', '区域', '日期', '销售额', '利润', '实际售价', '销售数'] + CONSTANTS['SKU_COLUMNS']
+
+    def __init__(self, df, cube=None):
         self.df = df.copy()
+        self.cube = cube
         self.results = {}
     
     def abc_classification_analysis(self):
         if '商品品类' not in self.df.columns or '销售额' not in self.df.columns:
             return None
             
-        category_stats = self.df.groupby('商品品类').agg({
-            '销售额': 'sum',
-            '利润': 'sum'
-        }).reset_index()
-        
-        category_stats = category_stats.sort_values('销售额', ascending=False)
-        category_stats['销售额累计占比%'] = (
-            category_stats['销售额'].cumsum() / category_stats['销售额'].sum() * 100
-        ).round(2)
+        if self.cube is not None and '商品品类' in self.cube.dimensions and {'销售额', '利润'} <= set(self.cube.measures):
+            category_stats = self.cube.rollup(['商品品类'], ['销售额', '利润'])
+        else:
+            category_stats = self.df.groupby('商品品类', observed=True).agg({
+                '销售额': 'sum',
+                '利润': 'sum'
+            }).reset_index()
         
-        def assign_abc_class(cumulative_percent):
-            if cumulative_percent <= 70:
-                return 'A类'
-            elif cumulative_percent <= 90:
-                return 'B类'
-            else:
-                return 'C类'
-        
-        category_stats['ABC分类'] = category_stats['销售额累计占比%'].apply(assign_abc_class)
+        category_stats = category_abc_table(category_stats)
         
         self.results['abc_classification'] = category_stats
         return category_stats
     
+    def abc_xyz_analysis(self, item_col=None, region_col='省份'):
+        if item_col is None:
+            item_col = next((col for col in CONSTANTS['SKU_COLUMNS'] if col in self.df.columns), '商品品类')
+        if item_col not in self.df.columns or '销售额' not in self.df.columns:
+            return None
+
+        # 对象级 ABC（销售额）+ XYZ（各期需求变异系数），以及按区域分别分级
+        abc_xyz = abc_xyz_classification(self.df, item_col)
+        self.results['abc_xyz'] = abc_xyz
+        if region_col in self.df.columns:
+            self.results['abc_xyz_by_region'] = abc_xyz_classification(self.df, item_col, group_col=region_col)
+        return abc_xyz
+    
     def price_sensitivity_analysis(self):
         if '商品品类' not in self.df.columns or '实际售价' not in self.df.columns or '销售数' not in self.df.columns:
             return None
             
-        sensitivity_results = []
-        
-        for category in self.df['商品品类'].unique():
-            category_data = self.df[self.df['商品品类'] == category]
-            
-            if len(category_data) < 5:
-                continue
-                
-            try:
-                price_correlation = category_data['实际售价'].corr(category_data['销售数'])
-                
-                if price_correlation < -0.3:
-                    sensitivity_level = '高敏感'
-                elif price_correlation < -0.1:
-                    sensitivity_level = '中敏感'
-                else:
-                    sensitivity_level = '低敏感'
-                    
-                sensitivity_results.append({
-                    '商品品类': category,
-                    '价格销量相关性': round(price_correlation, 4),
-                    '敏感度等级': sensitivity_level,
-                    '平均价格': round(category_data['实际售价'].mean(), 2),
-                    '平均销量': round(category_data['销售数'].mean(), 2)
-                })
-            except:
-                continue
-                
-        sensitivity_df = pd.DataFrame(sensitivity_results)
+        sensitivity_df = grouped_price_sensitivity(self.df, '商品品类', '实际售价', '销售数')
         self.results['price_sensitivity'] = sensitivity_df.sort_values('价格销量相关性')
         return sensitivity_df
     
@@ -76,30 +58,28 @@ class Task4Optimizer:
         price_data = self.results.get('price_sensitivity')
         
         if abc_data is not None:
-            for _, row in abc_data.iterrows():
-                category = row['商品品类']
-                abc_class = row['ABC分类']
-                
-                if abc_class == 'A类':
-                    strategies.append(f"{category}: 重点管理，优化库存和定价策略")
-                elif abc_class == 'B类':
-                    strategies.append(f"{category}: 适度关注，可进行促销活动")
-                else:
-                    strategies.append(f"{category}: 简化管理，考虑减少库存")
+            strategies.extend(
+                (abc_data['商品品类'].astype(str) + ': ' + abc_data['ABC分类'].map(ABC_STRATEGIES)).tolist()
+            )
         
-        if price_data is not None:
-            for _, row in price_data.iterrows():
-                if row['敏感度等级'] == '高敏感':
-                    strategies.append(f"{row['商品品类']}: 价格敏感，建议谨慎调价")
+        if price_data is not None and not price_data.empty:
+            sensitive = price_data.loc[price_data['敏感度等级'] == '高敏感', '商品品类']
+            strategies.extend((sensitive.astype(str) + ': 价格敏感，建议谨慎调价').tolist())
         
         self.results['strategies'] = strategies
         return strategies
     
-    def perform_optimization(self):
+    def perform_optimization(self, progress=None):
+        report = progress or (lambda stage, fraction: None)
         results = {}
         
+        report('ABC 分类', 0.0)
         results['abc_analysis'] = self.abc_classification_analysis()
+        report('ABC-XYZ 分类', 0.25)
+        results['abc_xyz'] = self.abc_xyz_analysis()
+        report('价格敏感度', 0.6)
         results['price_sensitivity'] = self.price_sensitivity_analysis()
+        report('运营策略', 0.85)
         results['strategies'] = self.generate_operation_strategies()
         
         return results
@@ -1,5 +1,7 @@
-from .data_utils import load_data, save_data, clean_data
+from .data_utils import load_data, iter_csv_chunks, save_data, clean_data
 from .visualization_utils import create_plot, save_plot
 from .config_utils import load_config, save_config
+from .job_scheduler import JobScheduler
+from .cache_utils import DatasetCache, ResultCache, ModelStore, dataset_fingerprint, hash_bytes
 
-__all__ = ['load_data', 'save_data', 'clean_data', 'create_plot', 'save_plot', 'load_config', 'save_config']
+__all__ = ['load_data', 'iter_csv_chunks', 'save_data', 'clean_data', 'create_plot', 'save_plot', 'load_config', 'save_config', 'DatasetCache', 'ResultCache', 'ModelStore', 'dataset_fingerprint', 'hash_bytes', 'JobScheduler']
@@ -0,0 +1,355 @@
+import hashlib
+import os
+import pickle
+import sys
+import threading
+import time
+from collections import OrderedDict
+from importlib import metadata
+import numpy as np
+import pandas as pd
+from config.settings import SETTINGS
+
+try:
+    import pyarrow  # noqa: F401
+    PARQUET_AVAILABLE = True
+except ImportError:
+    PARQUET_AVAILABLE = False
+
+# 清洗逻辑变化时递增，旧缓存自动失效
+CACHE_VERSION = 5
+
+def hash_bytes(data, *extra):
+    hasher = hashlib.blake2b(digest_size=20)
+    if hasattr(data, 'read'):
+        # 文件对象按块读入哈希，不先复制出一份完整的 bytes；结果与对全部内容一次哈希相同
+        data.seek(0)
+        for block in iter(lambda: data.read(1 << 20), b''):
+            hasher.update(block)
+        data.seek(0)
+    else:
+        hasher.update(data)
+    for item in extra:
+        hasher.update(str(item).encode('utf-8'))
+    return hasher.hexdigest()
+
+def dataset_fingerprint(df):
+    hasher = hashlib.blake2b(digest_size=20)
+    hasher.update(pd.util.hash_pandas_object(df, index=True).values.tobytes())
+    hasher.update(repr([(str(col), str(dtype)) for col, dtype in df.dtypes.items()]).encode('utf-8'))
+    return hasher.hexdigest()
+
+def settings_fingerprint(settings_section):
+    if settings_section is None:
+        return ''
+    return hash_bytes(repr(sorted(settings_section.items())).encode('utf-8'))
+
+def data_fingerprint(data):
+    if isinstance(data, tuple):
+        return hash_bytes(''.join(data_fingerprint(item) for item in data).encode('utf-8'))
+    if isinstance(data, (pd.DataFrame, pd.Series)):
+        return dataset_fingerprint(data.to_frame() if isinstance(data, pd.Series) else data)
+    array = np.ascontiguousarray(data)
+    return hash_bytes(array.tobytes(), array.dtype.str, array.shape)
+
+def _library_versions():
+    # 不同版本的 sklearn/statsmodels/xgboost 之间 pickle 不保证兼容，版本号计入模型键
+    versions = []
+    for package in ('scikit-learn', 'statsmodels', 'xgboost'):
+        try:
+            versions.append(f"{package}={metadata.version(package)}")
+        except metadata.PackageNotFoundError:
+            versions.append(f"{package}=")
+    return ','.join(versions)
+
+MODEL_LIBRARY_VERSIONS = _library_versions()
+
+# 估算结果大小时向下展开的最大层数，更深的对象只计自身大小
+ESTIMATE_MAX_DEPTH = 6
+
+def estimate_size(value, seen=None, depth=0):
+    # 同一对象只计一次，避免循环引用导致无限递归；层数受限，大模型对象不会整图遍历
+    seen = set() if seen is None else seen
+    if id(value) in seen:
+        return 0
+    seen.add(id(value))
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(index=True, deep=True).sum())
+    if isinstance(value, pd.Series):
+        return int(value.memory_usage(index=True, deep=True))
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    if depth >= ESTIMATE_MAX_DEPTH:
+        return sys.getsizeof(value)
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(
+            estimate_size(k, seen, depth + 1) + estimate_size(v, seen, depth + 1) for k, v in value.items()
+        )
+    if isinstance(value, (list, tuple, set)):
+        return sys.getsizeof(value) + sum(estimate_size(item, seen, depth + 1) for item in value)
+    if hasattr(value, '__dict__') and not isinstance(value, type):
+        return sys.getsizeof(value) + estimate_size(vars(value), seen, depth + 1)
+    return sys.getsizeof(value)
+
+class DatasetCache:
+    def __init__(self, cache_dir=None, max_bytes=None):
+        settings = SETTINGS['cache']
+        self.cache_dir = cache_dir or settings['dataset_dir']
+        self.max_bytes = max_bytes if max_bytes is not None else settings['dataset_max_mb'] * 1024 ** 2
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def make_key(self, data, *extra):
+        return hash_bytes(data, CACHE_VERSION, *extra)
+
+    def _path(self, key, ext):
+        return os.path.join(self.cache_dir, f"{key}{ext}")
+
+    def _find(self, key):
+        for ext in ('.parquet', '.pkl'):
+            path = self._path(key, ext)
+            if os.path.exists(path):
+                return path
+        return None
+
+    def get(self, key):
+        path = self._find(key)
+        if path is None:
+            self.misses += 1
+            return None
+
+        try:
+            if path.endswith('.parquet'):
+                df = pd.read_parquet(path)
+            else:
+                with open(path, 'rb') as file:
+                    df = pickle.load(file)
+        except Exception:
+            os.remove(path)
+            self.misses += 1
+            return None
+
+        # 以修改时间记录最近访问，用于 LRU 淘汰
+        os.utime(path)
+        self.hits += 1
+        return df
+
+    def put(self, key, df):
+        path = None
+        if PARQUET_AVAILABLE:
+            path = self._path(key, '.parquet')
+            try:
+                df.to_parquet(path + '.tmp', index=True)
+            except Exception:
+                # 混合类型的 object 列无法写成 Parquet 时退回 pickle
+                if os.path.exists(path + '.tmp'):
+                    os.remove(path + '.tmp')
+                path = None
+
+        if path is None:
+            path = self._path(key, '.pkl')
+            with open(path + '.tmp', 'wb') as file:
+                pickle.dump(df, file, protocol=pickle.HIGHEST_PROTOCOL)
+
+        os.replace(path + '.tmp', path)
+        self.evict()
+        return path
+
+    def get_or_load(self, key, loader):
+        df = self.get(key)
+        if df is None:
+            df = loader()
+            self.put(key, df)
+        return df
+
+    def _entries(self):
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if name.endswith('.tmp'):
+                continue
+            path = os.path.join(self.cache_dir, name)
+            stat = os.stat(path)
+            entries.append((stat.st_mtime, stat.st_size, path))
+        return sorted(entries)
+
+    def evict(self):
+        entries = self._entries()
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            os.remove(path)
+            total -= size
+            removed += 1
+        return removed
+
+    def clear(self):
+        for _, _, path in self._entries():
+            os.remove(path)
+
+    def stats(self):
+        entries = self._entries()
+        requests = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / requests if requests else 0.0,
+            'entries': len(entries),
+            'size_bytes': sum(size for _, size, _ in entries),
+            'max_bytes': self.max_bytes
+        }
+
+class ModelStore(DatasetCache):
+    def __init__(self, cache_dir=None, max_bytes=None, max_age_days=None, memory_entries=None):
+        settings = SETTINGS['cache']
+        super().__init__(
+            cache_dir=cache_dir or settings['model_dir'],
+            max_bytes=max_bytes if max_bytes is not None else settings['model_max_mb'] * 1024 ** 2
+        )
+        self.max_age_days = settings['model_max_age_days'] if max_age_days is None else max_age_days
+        self.memory_entries = settings['model_memory_entries'] if memory_entries is None else memory_entries
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+
+    def model_key(self, name, data, params=None):
+        # 训练数据指纹 + 模型参数 + 库版本共同决定键，数据或参数任一变化都会重新拟合
+        params = params.get_params() if hasattr(params, 'get_params') else params
+        params = repr(sorted(params.items())) if isinstance(params, dict) else repr(params)
+        return self.make_key(name.encode('utf-8'), data_fingerprint(data), params, MODEL_LIBRARY_VERSIONS)
+
+    def _find(self, key):
+        path = self._path(key, '.pkl')
+        return path if os.path.exists(path) else None
+
+    def get(self, key):
+        # 快速路径：本进程最近用过的模型直接从内存返回，不再反序列化
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                return self._memory[key]
+
+        path = self._find(key)
+        if path is None:
+            self.misses += 1
+            return None
+        try:
+            with open(path, 'rb') as file:
+                model = pickle.load(file)
+        except Exception:
+            os.remove(path)
+            self.misses += 1
+            return None
+
+        os.utime(path)
+        self.hits += 1
+        self._remember(key, model)
+        return model
+
+    def _remember(self, key, model):
+        with self._lock:
+            self._memory[key] = model
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.memory_entries:
+                self._memory.popitem(last=False)
+
+    def put(self, key, model):
+        path = self._path(key, '.pkl')
+        with open(path + '.tmp', 'wb') as file:
+            pickle.dump(model, file, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(path + '.tmp', path)
+        self._remember(key, model)
+        self.evict()
+        return path
+
+    def get_or_fit(self, key, fit):
+        model = self.get(key)
+        if model is None:
+            model = fit()
+            self.put(key, model)
+        return model
+
+    def evict(self):
+        # 先删除超过 max_age_days 未被访问的过期模型，再按 LRU 淘汰到容量上限以内
+        removed = 0
+        if self.max_age_days:
+            cutoff = time.time() - self.max_age_days * 86400
+            for mtime, _, path in self._entries():
+                if mtime < cutoff:
+                    os.remove(path)
+                    removed += 1
+        return removed + super().evict()
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+        super().clear()
+
+class ResultCache:
+    def __init__(self, max_bytes=None):
+        self.max_bytes = max_bytes if max_bytes is not None else SETTINGS['cache']['result_max_mb'] * 1024 ** 2
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(task_name, fingerprint, settings_section=None):
+        return (task_name, fingerprint, settings_fingerprint(settings_section))
+
+    def get(self, key):
+        with self._lock:
+            if key not in self._entries:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return self._entries[key][0]
+
+    def put(self, key, value):
+        size = estimate_size(value)
+        with self._lock:
+            if key in self._entries:
+                self._size -= self._entries.pop(key)[1]
+            if size > self.max_bytes:
+                return value
+            self._entries[key] = (value, size)
+            self._size += size
+            while self._size > self.max_bytes:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self._size -= evicted_size
+        return value
+
+    def get_or_compute(self, key, compute):
+        value = self.get(key)
+        if value is None:
+            value = self.put(key, compute())
+        return value
+
+    def invalidate(self, task_name=None, fingerprint=None):
+        with self._lock:
+            removed = [
+                key for key in self._entries
+                if (task_name is None or key[0] == task_name) and (fingerprint is None or key[1] == fingerprint)
+            ]
+            for key in removed:
+                self._size -= self._entries.pop(key)[1]
+        return len(removed)
+
+    def clear(self):
+        return self.invalidate()
+
+    def stats(self):
+        with self._lock:
+            requests = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / requests if requests else 0.0,
+                'entries': len(self._entries),
+                'size_bytes': self._size,
+                'max_bytes': self.max_bytes
+            }
@@ -1,7 +1,16 @@
+import io
+import os
+import re
+import zipfile
+from itertools import repeat
 import pandas as pd
 import numpy as np
+from config.settings import SETTINGS
+from src.utils.job_scheduler import process_pool
 
-def load_data(file_path, file_type='auto'):
+DIMENSION_PATTERN = re.compile(rb'<(\w+:)?dimension\b')
+
+def load_data(file_path, file_type='auto', chunksize=None):
     if file_type == 'auto':
         if file_path.endswith('.xlsx'):
             file_type = 'excel'
@@ -9,12 +18,97 @@ def load_data(file_path, file_type='auto'):
             file_type = 'csv'
     
     if file_type == 'excel':
-        return pd.read_excel(file_path)
+        sheet_name = None if SETTINGS['data_processing']['excel_all_sheets'] else 0
+        return read_excel_fast(file_path, sheet_name=sheet_name)
     elif file_type == 'csv':
+        if chunksize:
+            return iter_csv_chunks(file_path, chunksize=chunksize)
         return pd.read_csv(file_path)
     else:
         raise ValueError("Unsupported file type")
 
+def iter_csv_chunks(file_path, chunksize=100000, **kwargs):
+    # 分块读取，内存峰值只取决于 chunksize 而不是文件大小
+    with pd.read_csv(file_path, chunksize=chunksize, **kwargs) as reader:
+        for chunk in reader:
+            yield chunk
+
+def _open_workbook(source):
+    from openpyxl import load_workbook
+    # 只读模式按行流式解析 XML，不建立完整的单元格对象树
+    return load_workbook(io.BytesIO(source) if isinstance(source, bytes) else source, read_only=True, data_only=True)
+
+def _dimensions_recorded(source):
+    # Excel 保存的工作表开头都有 <dimension> 记录；缺少时 openpyxl 每次打开工作簿都会完整扫描每个工作表，
+    # 多进程各自打开反而更慢，只能在同一个工作簿对象上顺序读取
+    with zipfile.ZipFile(io.BytesIO(source) if isinstance(source, bytes) else source) as archive:
+        for name in archive.namelist():
+            if name.startswith('xl/worksheets/') and name.endswith('.xml'):
+                with archive.open(name) as file:
+                    if DIMENSION_PATTERN.search(file.read(4096)) is None:
+                        return False
+    return True
+
+def _sheet_frame(worksheet, usecols=None):
+    rows = worksheet.iter_rows(values_only=True)
+    header = next(rows, None)
+    if header is None:
+        return pd.DataFrame()
+    # values_only 直接产出值元组，省去逐个单元格的对象创建与类型转换
+    df = pd.DataFrame.from_records(list(rows), columns=range(len(header)))
+
+    columns = [name if name is not None else f"Unnamed: {i}" for i, name in enumerate(header)]
+    df.columns = columns
+    # 表头为空且整列无值的是格式残留的空白列；整行为空的是表尾空白行
+    empty = [col for i, col in enumerate(columns) if header[i] is None and df[col].isna().all()]
+    df = df.drop(columns=empty).dropna(how='all')
+    if usecols is not None:
+        df = df[[col for col in df.columns if col in usecols]]
+    return df.reset_index(drop=True)
+
+def _read_sheet(source, sheet_name, usecols=None):
+    workbook = _open_workbook(source)
+    try:
+        return _sheet_frame(workbook[sheet_name], usecols)
+    finally:
+        workbook.close()
+
+def read_excel_fast(source, sheet_name=0, usecols=None, max_workers=None, sheet_column=None):
+    # sheet_name 为 None 时读取全部工作表，只合并表头与第一个工作表一致的（汇总、说明等工作表被跳过）；
+    # 多个工作表在进程池中并行解析
+    if hasattr(source, 'read'):
+        source = source.read()
+    max_workers = max_workers or SETTINGS['data_processing']['excel_workers'] or os.cpu_count() or 1
+
+    workbook = _open_workbook(source)
+    try:
+        if sheet_name is None:
+            sheet_names = workbook.sheetnames
+        elif isinstance(sheet_name, int):
+            sheet_names = [workbook.sheetnames[sheet_name]]
+        else:
+            sheet_names = [sheet_name] if isinstance(sheet_name, str) else list(sheet_name)
+        parallel = max_workers > 1 and len(sheet_names) > 1 and _dimensions_recorded(source)
+        frames = None if parallel else [_sheet_frame(workbook[name], usecols) for name in sheet_names]
+    finally:
+        workbook.close()
+
+    if parallel:
+        with process_pool(min(max_workers, len(sheet_names))) as executor:
+            frames = list(executor.map(_read_sheet, repeat(source), sheet_names, repeat(usecols)))
+
+    sheets = [(name, frame) for name, frame in zip(sheet_names, frames) if len(frame.columns)]
+    if sheet_name is None and sheets:
+        header = set(sheets[0][1].columns)
+        sheets = [(name, frame) for name, frame in sheets if set(frame.columns) == header]
+    if sheet_column is not None:
+        for name, frame in sheets:
+            frame[sheet_column] = name
+    frames = [frame for _, frame in sheets]
+    if not frames:
+        return pd.DataFrame()
+    return frames[0] if len(frames) == 1 else pd.concat(frames, ignore_index=True)
+
 def save_data(df, file_path, file_type='auto'):
     if file_type == 'auto':
         if file_path.endswith('.xlsx'):
@@ -38,6 +132,8 @@ def clean_data(df):
     
     categorical_cols = df_clean.select_dtypes(exclude=[np.number]).columns
     for col in categorical_cols:
+        if isinstance(df_clean[col].dtype, pd.CategoricalDtype) and '未知' not in df_clean[col].cat.categories:
+            df_clean[col] = df_clean[col].cat.add_categories('未知')
         df_clean[col] = df_clean[col].fillna('未知')
     
     return df_clean
@@ -0,0 +1,162 @@
+import multiprocessing
+import threading
+import time
+import traceback
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from config.settings import SETTINGS
+
+QUEUED = '排队中'
+RUNNING = '运行中'
+FINISHED = '已完成'
+FAILED = '失败'
+
+def process_pool(max_workers, **kwargs):
+    # 任务在调度器的工作线程中运行：fork 多线程进程会把其他线程持有的锁原样复制进子进程，子进程可能死锁，
+    # 因此进程池默认以 spawn 启动子进程
+    context = multiprocessing.get_context(SETTINGS['jobs']['process_start_method'])
+    return ProcessPoolExecutor(max_workers=max_workers, mp_context=context, **kwargs)
+
+class Job:
+    def __init__(self, name, key=None):
+        self.job_id = uuid.uuid4().hex
+        self.name = name
+        self.key = key
+        self.status = QUEUED
+        self.progress = 0.0
+        self.stage = None
+        self.stages = []
+        self.result = None
+        self.error = None
+        self.traceback = None
+        self.submitted_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.future = None
+        self._stage_start = None
+        self._lock = threading.Lock()
+
+    @property
+    def done(self):
+        return self.status in (FINISHED, FAILED)
+
+    def _close_stage(self, now):
+        if self.stage is not None and self._stage_start is not None:
+            self.stages.append((self.stage, now - self._stage_start))
+        self.stage, self._stage_start = None, None
+
+    def report(self, stage, fraction=None):
+        # 任务在每个阶段开始时调用：上一阶段计时结束，新阶段开始计时
+        with self._lock:
+            now = time.perf_counter()
+            self._close_stage(now)
+            self.stage, self._stage_start = stage, now
+            if fraction is not None:
+                self.progress = min(max(float(fraction), 0.0), 1.0)
+
+    def _finish(self, status):
+        with self._lock:
+            self._close_stage(time.perf_counter())
+            self.status = status
+            self.finished_at = time.time()
+            if status == FINISHED:
+                self.progress = 1.0
+
+    def elapsed_seconds(self):
+        if self.started_at is None:
+            return 0.0
+        return (self.finished_at or time.time()) - self.started_at
+
+    def snapshot(self):
+        with self._lock:
+            stages = list(self.stages)
+            if self.stage is not None and self._stage_start is not None:
+                stages.append((f"{self.stage}（进行中）", time.perf_counter() - self._stage_start))
+            return {
+                'job_id': self.job_id,
+                'name': self.name,
+                'status': self.status,
+                'progress': self.progress,
+                'stage': self.stage,
+                'stages': stages,
+                'elapsed_seconds': self.elapsed_seconds(),
+                'error': self.error
+            }
+
+class JobScheduler:
+    def __init__(self, max_workers=None, max_finished=None):
+        settings = SETTINGS['jobs']
+        self.max_workers = max_workers or settings['max_workers']
+        self.max_finished = settings['max_finished'] if max_finished is None else max_finished
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='task-job')
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+
+    def submit(self, name, fn, key=None, on_done=None):
+        # 同一 key 的任务正在排队或运行时直接返回该任务，页面重跑不会重复提交
+        with self._lock:
+            running = self._find(key)
+            if running is not None and not running.done:
+                return running
+            job = Job(name, key)
+            self._jobs[job.job_id] = job
+            self._prune()
+        job.future = self._executor.submit(self._run, job, fn, on_done)
+        return job
+
+    def _run(self, job, fn, on_done):
+        job.status = RUNNING
+        job.started_at = time.time()
+        try:
+            job.result = fn(job.report)
+            if on_done is not None:
+                on_done(job.result)
+            job._finish(FINISHED)
+        except Exception as e:
+            job.error = f"{type(e).__name__}: {e}"
+            job.traceback = traceback.format_exc()
+            job._finish(FAILED)
+        return job.result
+
+    def _find(self, key):
+        if key is None:
+            return None
+        for job in reversed(self._jobs.values()):
+            if job.key == key:
+                return job
+        return None
+
+    def find(self, key):
+        with self._lock:
+            return self._find(key)
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def jobs(self):
+        with self._lock:
+            return list(self._jobs.values())
+
+    def cancel(self, job_id):
+        # 线程中的任务无法中断，只能取消仍在排队的任务
+        job = self.get(job_id)
+        if job is None or job.future is None or not job.future.cancel():
+            return False
+        job.error = "已取消"
+        job._finish(FAILED)
+        return True
+
+    def _prune(self):
+        finished = [job_id for job_id, job in self._jobs.items() if job.done]
+        for job_id in finished[:max(0, len(finished) - self.max_finished)]:
+            del self._jobs[job_id]
+
+    def clear_finished(self):
+        with self._lock:
+            for job_id in [job_id for job_id, job in self._jobs.items() if job.done]:
+                del self._jobs[job_id]
+
+    def shutdown(self, wait=True):
+        self._executor.shutdown(wait=wait)
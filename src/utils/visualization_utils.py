@@ -1,8 +1,9 @@
 import matplotlib.pyplot as plt
 import seaborn as sns
-import plotly.express as px
 
 def create_plot(df, plot_type='line', x_col=None, y_col=None, **kwargs):
+    # plotly 只在生成交互图时导入，命令行批处理不加载
+    import plotly.express as px
     if plot_type == 'line':
         fig = px.line(df, x=x_col, y=y_col, **kwargs)
     elif plot_type == 'bar':